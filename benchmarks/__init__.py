@@ -0,0 +1,2 @@
+"""Benchmarks for the user story generator. Run from the repository root,
+e.g. ``python -m benchmarks.bench_styles``."""
@@ -0,0 +1,32 @@
+"""Synthetic backlogs shaped like the bundled catalogue (user_stories/data/stories.json)."""
+
+import random
+
+ROLES = ["User"] * 33 + ["Admin"] * 27  # same mix as the real catalogue
+ACTIONS = ["view", "search", "filter", "update", "cancel", "export", "approve", "delete"]
+OBJECTS = ["products", "orders", "bills", "notifications", "users", "categories", "stock levels"]
+STEPS = ["GIVEN", "WHEN", "THEN", "AND", "AND"]
+EPICS = ["AUTHENTICATION & REGISTRATION", "USER PROFILE", "PRODUCT MANAGEMENT - ADMIN",
+         "PRODUCT BROWSING - USER", "PURCHASING - USER", "ORDER MANAGEMENT", "BILLING",
+         "NOTIFICATIONS", "USER MANAGEMENT - ADMIN", "STATISTICS & ANALYTICS", "SECURITY"]
+
+
+def synthetic_stories(count, seed=0):
+    """Yield ``count`` stories with the catalogue's role mix and 3-5 criteria."""
+    rng = random.Random(seed)
+    for n in range(1, count + 1):
+        role = rng.choice(ROLES)
+        action, obj = rng.choice(ACTIONS), rng.choice(OBJECTS)
+        who = "an admin" if role == "Admin" else "a user"
+        criteria = [
+            f"{step} I {action} the {obj} page for item {n}" if step != "THEN"
+            else f"THEN the {obj} should be shown with the latest changes for item {n}"
+            for step in STEPS[:rng.randint(3, 5)]
+        ]
+        yield {
+            "id": f"US-{n:02d}",
+            "epic": EPICS[n % len(EPICS)],
+            "role": role,
+            "story": f"As {who}, I want to {action} {obj} so that I can keep item {n} up to date",
+            "criteria": criteria,
+        }
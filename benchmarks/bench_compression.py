@@ -0,0 +1,50 @@
+"""Save time vs file size for each --compression level, serial and --parallel-zip.
+
+Writes the same backlog with the streaming openpyxl writer and the raw
+backend at every level and reports the total time, the "save" span (the
+openpyxl writer deflates its sheet there; the raw backend deflates as
+rows arrive unless it runs in parallel) and the file size. The parallel
+runs only pay off with more than one core (the CPU count is printed).
+
+    python -m benchmarks.bench_compression [ROWS]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.backlog import synthetic_stories
+from user_stories.compression import LEVELS
+from user_stories.profiling import Profiler
+from user_stories.writers import export
+
+
+def timed(stories, path, backend, compression, parallel):
+    profiler = Profiler().start()
+    start = time.perf_counter()
+    export(stories, [path], backend, compression=compression, parallel=parallel)
+    took = time.perf_counter() - start
+    profiler.stop()
+    return took, profiler.spans["save"][0], os.path.getsize(path)
+
+
+def main(rows=100_000):
+    stories = list(synthetic_stories(rows))
+    print(f"{rows} rows, {os.cpu_count()} CPUs")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "out.xlsx")
+        for backend in ("openpyxl", "raw"):
+            timed(stories, path, backend, "default", False)  # warm-up
+            for compression in LEVELS:
+                for parallel in (False, True):
+                    if parallel and compression == "stored":
+                        continue
+                    took, save, size = timed(stories, path, backend, compression, parallel)
+                    label = f"{compression}{' parallel' if parallel else ''}"
+                    print(f"  {backend:<8} {label:<17}: {took:7.2f}s  save {save:6.2f}s  "
+                          f"{size / 2**20:7.2f} MB")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,65 @@
+"""Near-duplicate detection on a large backlog.
+
+Synthetic stories draw their wording from a random vocabulary so that
+unrelated stories share few bigrams. Every PLANTED-th story is then
+re-emitted with the other role and one criterion reworded, the way the
+real catalogue repeats a story for users and admins. The report should
+find those pairs without comparing every pair of stories.
+
+    python -m benchmarks.bench_dedup [STORIES]
+"""
+
+import random
+import sys
+import time
+
+from user_stories.dedup import NearDuplicates
+
+PLANTED = 1_000
+VOCABULARY = 5_000
+
+
+def stories_with_duplicates(count, seed=0):
+    rng = random.Random(seed)
+    words = [f"w{n}" for n in range(VOCABULARY)]
+    planted = []
+    for n in range(1, count + 1):
+        story = {
+            "id": f"US-{n:02d}",
+            "role": rng.choice(["User", "Admin"]),
+            "story": f"As a user, I want to {' '.join(rng.choices(words, k=10))}",
+            "criteria": [f"{step} {' '.join(rng.choices(words, k=8))}" for step in ("GIVEN", "WHEN", "THEN")],
+        }
+        yield story
+        if n % PLANTED == 0:
+            twin = dict(story, id=f"US-{n:02d}-DUP", role="Admin" if story["role"] == "User" else "User")
+            twin["story"] = story["story"].replace("As a user", "As an admin")
+            twin["criteria"] = story["criteria"][:2] + [story["criteria"][2].rsplit(" ", 1)[0] + " changed"]
+            planted.append((story["id"], twin["id"]))
+            yield twin
+    stories_with_duplicates.planted = planted
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    count = int(argv[0]) if argv else 200_000
+
+    finder = NearDuplicates()
+    start = time.perf_counter()
+    for story in stories_with_duplicates(count):
+        finder.add(story)
+    signed = time.perf_counter() - start
+    start = time.perf_counter()
+    pairs = finder.pairs()
+    searched = time.perf_counter() - start
+
+    planted = set(stories_with_duplicates.planted)
+    found = {(pair.first, pair.second) for pair in pairs}
+    print(f"{len(finder.ids)} stories, bands {finder.bands} x rows {finder.rows}")
+    print(f"signatures          {signed:6.2f}s  ({len(finder.ids) / signed:,.0f} stories/s)")
+    print(f"LSH + verification  {searched:6.2f}s")
+    print(f"planted {len(planted)}, found {len(planted & found)}, other pairs {len(found - planted)}")
+
+
+if __name__ == "__main__":
+    main()
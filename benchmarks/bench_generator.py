@@ -0,0 +1,147 @@
+"""Generator benchmark suite: time and peak memory per phase.
+
+Builds synthetic backlogs shaped like the catalogue (same role mix, 3-5
+GIVEN/WHEN/THEN criteria) and runs each writer mode through its phases:
+
+    generate  producing the synthetic stories alone (subtract it from fill)
+    setup     workbook creation and style registration
+    fill      the row loop
+    save      wb.save / closing the zip
+
+Peak memory per phase is recorded with tracemalloc, which slows Python code
+down; pass --no-memory for clean timings.
+
+    python -m benchmarks.bench_generator [--sizes 60,10000] [--modes memory,stream,raw]
+                                         [--no-memory] [--json results.json]
+
+The full default run (up to 1M stories in every mode) takes a long time and
+the in-memory mode needs several GB at 1M rows.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.backlog import synthetic_stories
+from user_stories.rawxlsx import RawXlsxWriter
+from user_stories.rows import HEADERS, story_values
+from user_stories.workbook import XlsxWriter, new_workbook, write_story_row
+
+SIZES = [60, 10_000, 100_000, 1_000_000]
+MODES = ["memory", "stream", "raw"]
+PHASES = ["generate", "setup", "fill", "save"]
+
+
+class Phases:
+    """Collects wall time and tracemalloc peak for consecutive named phases."""
+
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.results = {}
+
+    def run(self, name, func, *args):
+        if self.memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        value = func(*args)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] - base if self.memory else None
+        self.results[name] = {"seconds": elapsed, "peak_bytes": peak}
+        return value
+
+
+def _consume(stories):
+    count = 0
+    for _ in stories:
+        count += 1
+    return count
+
+
+def _memory_mode(phases, size, path):
+    wb = phases.run("setup", new_workbook)
+
+    def fill():
+        ws = wb.active
+        for row, story in enumerate(synthetic_stories(size), 2):
+            write_story_row(ws, row, story)
+
+    phases.run("fill", fill)
+    phases.run("save", wb.save, path)
+
+
+def _writer_mode(phases, size, path, make_writer):
+    writer = phases.run("setup", make_writer, path)
+
+    def fill():
+        writer.write_header(HEADERS)
+        for story in synthetic_stories(size):
+            writer.write_row(story_values(story), story)
+
+    phases.run("fill", fill)
+    phases.run("save", writer.close)
+
+
+def run(size, mode, memory=True):
+    phases = Phases(memory)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "stories.xlsx")
+        phases.run("generate", _consume, synthetic_stories(size))
+        if mode == "memory":
+            _memory_mode(phases, size, path)
+        elif mode == "stream":
+            _writer_mode(phases, size, path, XlsxWriter)
+        else:
+            _writer_mode(phases, size, path, RawXlsxWriter)
+        output_bytes = os.path.getsize(path)
+    return {"size": size, "mode": mode, "output_bytes": output_bytes, "phases": phases.results}
+
+
+def _mb(value):
+    return "-" if value is None else f"{value / 1e6:.1f}"
+
+
+def report(result):
+    cells = [f"{result['size']:>9}", f"{result['mode']:<7}"]
+    for phase in PHASES:
+        data = result["phases"][phase]
+        cells.append(f"{data['seconds']:8.2f}s {_mb(data['peak_bytes']):>8}")
+    cells.append(f"{result['output_bytes'] / 1e6:8.1f}")
+    print("  ".join(cells), flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time and measure the generator phase by phase.")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="comma-separated backlog sizes")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"comma-separated, from {', '.join(MODES)}")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc for clean timings")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    modes = args.modes.split(",")
+    for mode in modes:
+        if mode not in MODES:
+            parser.error(f"unknown mode {mode!r}")
+
+    memory = not args.no_memory
+    if memory:
+        tracemalloc.start()
+    print(f"{'stories':>9}  {'mode':<7}  " + "  ".join(f"{phase + ' s / MB':>18}" for phase in PHASES)
+          + f"  {'file MB':>8}")
+    results = []
+    for size in sizes:
+        for mode in modes:
+            result = run(size, mode, memory)
+            report(result)
+            results.append(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fp:
+            json.dump(results, fp, indent=2)
+
+
+if __name__ == "__main__":
+    main()
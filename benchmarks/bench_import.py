@@ -0,0 +1,71 @@
+"""Import speed and memory for a large edited workbook.
+
+Builds a synthetic backlog with the raw backend, then times reading it
+back with ``iter_workbook`` alone, and indexing the catalogue plus merging
+the rows over it, as ``python -m user_stories import`` does. Each phase
+runs in a forked child, and the growth of the child's peak RSS shows how
+memory follows the row count: the read alone keeps only openpyxl's row
+heights, the merge adds Merge's per-story index.
+
+    python -m benchmarks.bench_import [STORIES]
+"""
+
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from benchmarks.backlog import synthetic_stories
+from user_stories.importer import Merge, iter_workbook
+from user_stories.writers import export
+
+
+def _read(path, count):
+    return sum(1 for _ in iter_workbook(path)), None
+
+
+def _merge(path, count):
+    merge = Merge(synthetic_stories(count))
+    merged = sum(1 for _ in merge.stories(iter_workbook(path)))
+    return merged, (len(merge.added), len(merge.removed))
+
+
+def _measure(phase, path, count, results):
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    rows, extra = phase(path, count)
+    took = time.perf_counter() - start
+    results.put((rows, extra, took, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before))
+
+
+def measured(phase, path, count):
+    """``(rows, extra, seconds, peak RSS growth in KB)`` of ``phase`` run in a fresh child."""
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    child = context.Process(target=_measure, args=(phase, path, count, results))
+    child.start()
+    result = results.get()
+    child.join()
+    return result
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    count = int(argv[0]) if argv else 100_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "stories.xlsx")
+        export(synthetic_stories(count), [path], "raw")
+        rows, _, read, read_grown = measured(_read, path, count)
+        merged, (added, removed), merging, merge_grown = measured(_merge, path, count)
+
+    print(f"{count} stories, {rows} rows read, {merged} merged, {added} new, {removed} removed")
+    print(f"read workbook         {read:6.2f}s  ({rows / read:,.0f} rows/s, peak RSS +{read_grown / 1024:.1f} MB)")
+    print(f"index + read + merge  {merging:6.2f}s  ({merged / merging:,.0f} rows/s, "
+          f"peak RSS +{merge_grown / 1024:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
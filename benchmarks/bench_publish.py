@@ -0,0 +1,62 @@
+"""Fan-out publishing vs one blocking render and save per destination.
+
+The destinations mirror a release: two copies of the full workbook (shared
+drive and build artifacts), a full CSV, and a filtered workbook per role
+and for two epics. The serial run renders and writes each destination in
+turn, the way separate ``wb.save`` calls do. ``publish`` renders each
+distinct output once and writes all of them concurrently. The slowest
+single write is printed for comparison.
+
+    python -m benchmarks.bench_publish [ROWS]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.backlog import synthetic_stories
+from user_stories.atomic import write_atomic
+from user_stories.publish import Destination, publish
+from user_stories.service import filter_stories, render
+
+TARGETS = (
+    "share/stories.xlsx",
+    "artifacts/stories.xlsx",
+    "artifacts/stories.csv",
+    "teams/user.xlsx?role=User",
+    "teams/admin.xlsx?role=Admin",
+    "teams/billing.xlsx?epic=BILLING",
+    "teams/security.xlsx?epic=SECURITY",
+)
+
+
+def serial(stories, destinations):
+    for destination in destinations:
+        write_atomic(destination.path, render(filter_stories(stories, destination.filters), destination.fmt))
+
+
+def main(rows=50_000):
+    stories = list(synthetic_stories(rows))
+    print(f"{rows} rows, {len(TARGETS)} destinations")
+    with tempfile.TemporaryDirectory() as tmp:
+        destinations = [Destination.parse(os.path.join(tmp, target)) for target in TARGETS]
+        render(stories[:10], "xlsx")  # warm-up
+        start = time.perf_counter()
+        serial(stories, destinations)
+        before = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = publish(stories, destinations)
+        after = time.perf_counter() - start
+        assert all(written.ok for written in results)
+
+    renders = len({destination.key for destination in destinations})
+    slowest = max(results, key=lambda written: written.seconds)
+    print(f"  render + save each : {before:7.2f}s  ({len(destinations)} renders)")
+    print(f"  publish            : {after:7.2f}s  ({renders} renders, {before / after:.2f}x faster)")
+    print(f"  slowest write      : {slowest.seconds:7.3f}s  {os.path.relpath(slowest.path, tmp)}")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,71 @@
+"""Raw SpreadsheetML writer vs openpyxl's write-only workbook.
+
+Checks that both produce the same sheet when read back with openpyxl, then
+times them on a synthetic backlog.
+
+    python -m benchmarks.bench_rawxlsx [ROWS]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from openpyxl import load_workbook
+
+from benchmarks.backlog import synthetic_stories
+from user_stories.loaders import load_stories
+from user_stories.writers import export
+
+
+def visible(cell):
+    """What a reader sees: value, fill, bold/size/colour, border and alignment."""
+    font, fill, border, align = cell.font, cell.fill, cell.border, cell.alignment
+    return (
+        cell.value,
+        fill.fill_type, fill.fgColor.rgb if fill.fill_type else None,
+        bool(font.b), font.sz, font.color.rgb if font.color is not None and font.color.type == "rgb" else None,
+        tuple(getattr(border, side).style for side in ("left", "right", "top", "bottom")),
+        align.horizontal, align.vertical, bool(align.wrap_text),
+    )
+
+
+def assert_same_sheet(expected_path, actual_path):
+    expected = load_workbook(expected_path).active
+    actual = load_workbook(actual_path).active
+    assert expected.max_row == actual.max_row and expected.max_column == actual.max_column
+    for expected_row, actual_row in zip(expected.iter_rows(), actual.iter_rows()):
+        for want, got in zip(expected_row, actual_row):
+            assert visible(want) == visible(got), (got.coordinate, visible(want), visible(got))
+    for row in range(1, expected.max_row + 1):
+        assert expected.row_dimensions[row].height == actual.row_dimensions[row].height, row
+    for letter in "ABCD":
+        assert expected.column_dimensions[letter].width == actual.column_dimensions[letter].width, letter
+
+
+def timed(stories, path, backend):
+    start = time.perf_counter()
+    export(stories, [path], backend)
+    return time.perf_counter() - start
+
+
+def main(rows=100_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        expected, actual = os.path.join(tmp, "openpyxl.xlsx"), os.path.join(tmp, "raw.xlsx")
+        for stories in (list(load_stories()), list(synthetic_stories(2000))):
+            export(stories, [expected], "openpyxl")
+            export(stories, [actual], "raw")
+            assert_same_sheet(expected, actual)
+        print("✓ raw output reads back the same as openpyxl's")
+
+        stories = list(synthetic_stories(rows))
+        slow = timed(stories, expected, "openpyxl")
+        fast = timed(stories, actual, "raw")
+        print(f"{rows} rows")
+        print(f"  openpyxl write-only : {slow:8.2f}s  {os.path.getsize(expected) / 1e6:7.1f} MB")
+        print(f"  raw SpreadsheetML   : {fast:8.2f}s  {os.path.getsize(actual) / 1e6:7.1f} MB")
+        print(f"  speedup             : {slow / fast:8.2f}x")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
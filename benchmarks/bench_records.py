@@ -0,0 +1,54 @@
+"""Memory held by a loaded catalogue: story dicts vs records.Story.
+
+Writes a synthetic backlog to JSONL, loads it back through load_stories
+(so every story has its own strings, as with a real file) and measures the
+memory retained by a list of the dicts, then by a list of Story records
+converted while streaming.
+
+    python -m benchmarks.bench_records [STORIES]
+"""
+
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.backlog import synthetic_stories
+from user_stories.loaders import dump_stories, load_stories
+from user_stories.records import compact
+
+
+def retained(load):
+    """Bytes still allocated after ``load()`` returns, and its run time."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = load()
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del value
+    gc.collect()
+    return size, elapsed
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    count = int(argv[0]) if argv else 200_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "stories.jsonl")
+        dump_stories(synthetic_stories(count), path)
+        dicts, dict_seconds = retained(lambda: list(load_stories(path)))
+        records, record_seconds = retained(lambda: list(compact(load_stories(path))))
+
+    print(f"{count} stories")
+    print(f"dicts     {dicts / 1e6:8.1f} MB  {dicts / count:6.0f} B/story  {dict_seconds:6.2f}s")
+    print(f"records   {records / 1e6:8.1f} MB  {records / count:6.0f} B/story  {record_seconds:6.2f}s")
+    print(f"saved     {(1 - records / dicts) * 100:7.1f} %")
+
+
+if __name__ == "__main__":
+    main()
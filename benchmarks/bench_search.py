@@ -0,0 +1,61 @@
+"""Search index build, incremental sync and query latency.
+
+Indexes a synthetic backlog from scratch, then edits a handful of stories
+and times the incremental sync, the no-op sync a query pays when nothing
+changed, and a few queries.
+
+    python -m benchmarks.bench_search [STORIES]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.backlog import synthetic_stories
+from user_stories.loaders import dump_stories
+from user_stories.search import SearchIndex
+
+EDITED = 100
+QUERIES = ("low stock threshold", "export bills", '"stock levels" approve', "cancel*", "US-4242")
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    count = int(argv[0]) if argv else 200_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        catalogue = os.path.join(tmp, "stories.jsonl")
+        database = os.path.join(tmp, "search.db")
+        dump_stories(synthetic_stories(count), catalogue)
+
+        index = SearchIndex(catalogue, database)
+        _, full = timed(index.sync)
+        _, noop = timed(index.sync)
+
+        stories = list(synthetic_stories(count))
+        for story in stories[::count // EDITED][:EDITED]:
+            story["criteria"] = story["criteria"] + ["AND a low stock threshold alert is raised"]
+        dump_stories(stories, catalogue)
+        del stories
+        _, incremental = timed(index.sync)
+        updated = index.updated
+
+        print(f"{count} stories, index {os.path.getsize(database) / 2**20:.1f} MB")
+        print(f"full index          {full:8.3f}s")
+        print(f"sync, {updated} changed  {incremental:8.3f}s")
+        print(f"sync, unchanged     {noop * 1000:8.2f}ms")
+        for query in QUERIES:
+            hits, took = timed(index.search, query)
+            print(f"search {query!r:<24} {took * 1000:8.2f}ms  {len(hits)} hits")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
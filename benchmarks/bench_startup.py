@@ -0,0 +1,78 @@
+"""Startup budget for the light CLI commands.
+
+Runs ``python -m user_stories <command>`` against the bundled catalogue in
+fresh interpreters and checks two things for each light command:
+
+  * openpyxl (and the writer modules that pull it in) is never imported;
+  * the best of --runs wall times stays under --budget milliseconds.
+
+Bare interpreter startup is measured first and reported next to each
+command, so the budget can be read against the machine's baseline.
+
+    python -m benchmarks.bench_startup [--commands stats,validate,list]
+                                       [--runs 5] [--budget 150]
+
+Exits with status 1 when a command imports openpyxl or goes over budget.
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+
+COMMANDS = ["stats", "validate", "list"]
+RUNS = 5
+BUDGET_MS = 150
+HEAVY_MODULES = ["openpyxl", "user_stories.workbook", "user_stories.styles"]
+
+_PROBE = """\
+import contextlib, io, sys
+from user_stories.cli import main
+with contextlib.redirect_stdout(io.StringIO()):
+    main(sys.argv[1:])
+print(",".join(name for name in {heavy!r} if name in sys.modules))
+"""
+
+
+def best_time(argv, runs):
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(argv, check=True, stdout=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def heavy_imports(command):
+    probe = _PROBE.format(heavy=HEAVY_MODULES)
+    result = subprocess.run([sys.executable, "-c", probe, command], check=True,
+                            capture_output=True, text=True)
+    return [name for name in result.stdout.strip().split(",") if name]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that the light CLI commands start fast.")
+    parser.add_argument("--commands", default=",".join(COMMANDS), help="comma-separated commands to time")
+    parser.add_argument("--runs", type=int, default=RUNS, help="runs per command, the best one counts")
+    parser.add_argument("--budget", type=float, default=BUDGET_MS, help="wall-time budget in milliseconds")
+    args = parser.parse_args(argv)
+
+    baseline = best_time([sys.executable, "-c", "pass"], args.runs)
+    print(f"{'interpreter':<10} {baseline:8.1f} ms")
+    failed = False
+    for command in args.commands.split(","):
+        elapsed = best_time([sys.executable, "-m", "user_stories", command], args.runs)
+        heavy = heavy_imports(command)
+        problems = []
+        if heavy:
+            problems.append(f"imports {', '.join(heavy)}")
+        if elapsed > args.budget:
+            problems.append(f"over the {args.budget:.0f} ms budget")
+        failed = failed or bool(problems)
+        print(f"{command:<10} {elapsed:8.1f} ms  (+{elapsed - baseline:.1f})  {'; '.join(problems) or 'ok'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,63 @@
+"""Per-cell style objects vs the shared named-style registry.
+
+    python -m benchmarks.bench_styles [ROWS]
+"""
+
+import sys
+import time
+
+from openpyxl import Workbook
+from openpyxl.styles import Alignment
+
+from benchmarks.backlog import synthetic_stories
+from user_stories import styles
+from user_stories.rows import story_values
+from user_stories.workbook import build_workbook, row_height
+
+
+def build_workbook_per_cell(stories):
+    """The original row loop: separate alignment, border and fill per cell."""
+    wb = Workbook()
+    ws = wb.active
+    row = 2
+    for story in stories:
+        values = story_values(story)
+        fill = styles.admin_fill if story["role"] == "Admin" else styles.user_fill
+        ws.cell(row=row, column=1).value = values[0]
+        ws.cell(row=row, column=1).alignment = Alignment(horizontal="center", vertical="top")
+        ws.cell(row=row, column=1).border = styles.border
+        ws.cell(row=row, column=2).value = values[1]
+        ws.cell(row=row, column=2).alignment = Alignment(horizontal="left", vertical="top", wrap_text=True)
+        ws.cell(row=row, column=2).border = styles.border
+        ws.cell(row=row, column=2).fill = fill
+        ws.cell(row=row, column=3).value = values[2]
+        ws.cell(row=row, column=3).alignment = Alignment(horizontal="center", vertical="top")
+        ws.cell(row=row, column=3).border = styles.border
+        ws.cell(row=row, column=3).fill = fill
+        ws.cell(row=row, column=4).value = values[3]
+        ws.cell(row=row, column=4).alignment = Alignment(horizontal="left", vertical="top", wrap_text=True)
+        ws.cell(row=row, column=4).border = styles.border
+        ws.cell(row=row, column=4).fill = styles.criteria_fill
+        ws.row_dimensions[row].height = row_height(story)
+        row += 1
+    return wb
+
+
+def timed(build, stories):
+    start = time.perf_counter()
+    build(stories)
+    return time.perf_counter() - start
+
+
+def main(rows=100_000):
+    stories = list(synthetic_stories(rows))
+    per_cell = timed(build_workbook_per_cell, stories)
+    named = timed(build_workbook, stories)
+    print(f"{rows} rows")
+    print(f"  per-cell styles : {per_cell:8.2f}s")
+    print(f"  named styles    : {named:8.2f}s")
+    print(f"  speedup         : {per_cell / named:8.2f}x")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,38 @@
+"""Per-cell fills vs the --table layout (conditional formatting in an Excel Table).
+
+Builds the same backlog both ways, in memory and streamed, and compares
+save time and file size.
+
+    python -m benchmarks.bench_table [ROWS]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.backlog import synthetic_stories
+from user_stories.workbook import write_workbook, write_workbook_streaming
+
+
+def timed(write, stories, path, table):
+    start = time.perf_counter()
+    write(stories, path, table=table)
+    return time.perf_counter() - start, os.path.getsize(path)
+
+
+def main(rows=100_000):
+    stories = list(synthetic_stories(rows))
+    print(f"{rows} rows")
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, write in (("memory", write_workbook), ("stream", write_workbook_streaming)):
+            path = os.path.join(tmp, f"{label}.xlsx")
+            fills, fills_size = timed(write, stories, path, False)
+            table, table_size = timed(write, stories, path, True)
+            print(f"  {label:<6} per-cell fills : {fills:7.2f}s  {fills_size / 2**20:7.2f} MB")
+            print(f"  {label:<6} --table        : {table:7.2f}s  {table_size / 2**20:7.2f} MB"
+                  f"  ({fills / table:.2f}x faster, {1 - table_size / fills_size:.1%} smaller)")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
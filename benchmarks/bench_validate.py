@@ -0,0 +1,69 @@
+"""Validator throughput on a large streamed catalogue.
+
+Writes a synthetic backlog to JSONL with a few broken stories mixed in,
+then times the validator alone on in-memory stories and together with
+``load_stories`` streaming the file, as ``python -m user_stories validate``
+does.
+
+    python -m benchmarks.bench_validate [STORIES]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.backlog import synthetic_stories
+from user_stories.loaders import dump_stories, load_stories
+from user_stories.validation import Validator
+
+BROKEN_EVERY = 10_000
+
+
+def broken_stories(count):
+    """Synthetic stories with one problem of each kind every BROKEN_EVERY stories."""
+    for n, story in enumerate(synthetic_stories(count)):
+        kind = n % BROKEN_EVERY
+        if kind == 1:
+            story["id"] = "US-01"
+        elif kind == 2:
+            story["story"] = story["story"].replace("I want", "I need")
+        elif kind == 3:
+            story["role"] = "Guest"
+        elif kind == 4:
+            story["criteria"] = []
+        yield story
+
+
+def check(stories):
+    validator = Validator()
+    for story in stories:
+        for _ in validator.check(story):
+            pass
+    return validator
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    count = int(argv[0]) if argv else 1_000_000
+
+    stories = list(broken_stories(count))
+    start = time.perf_counter()
+    validator = check(stories)
+    checked = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "stories.jsonl")
+        dump_stories(stories, path)
+        del stories
+        start = time.perf_counter()
+        check(load_stories(path))
+        streamed = time.perf_counter() - start
+
+    print(f"{count} stories, {validator.problems} problems")
+    print(f"validator only      {checked:6.2f}s  ({count / checked:,.0f} stories/s)")
+    print(f"load + validate     {streamed:6.2f}s  ({count / streamed:,.0f} stories/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+"""Build the user stories workbook; kept for ``python generate_user_stories.py [options]``.
+
+Without a command this runs ``build``, so the old invocation still works.
+See ``python -m user_stories --help`` for validate, stats and list.
+"""
+
+import sys
+
+from user_stories.cli import COMMANDS, main
+
+argv = sys.argv[1:]
+if not argv or (argv[0] not in COMMANDS and argv[0] not in ("-h", "--help")):
+    argv = ["build", *argv]
+raise SystemExit(main(argv))
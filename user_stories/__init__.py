@@ -0,0 +1 @@
+"""Generate the StockZen user stories and acceptance criteria workbook."""
@@ -0,0 +1,86 @@
+"""Replace files atomically: write a temporary file next to the target, then rename it over.
+
+A reader never sees a half-written file, and a failed write leaves the
+previous one in place. The temporary file is created by mkstemp, which
+makes it 0600. ``replace`` gives it the target's old permissions, or
+those a plain ``open(path, "w")`` would give a new file, before the
+rename.
+
+    with staged(path) as tmp:
+        write_everything_to(tmp)
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+def file_mode():
+    """Permissions ``open(path, "w")`` would create a file with, under the current umask.
+
+    The umask is process-wide and can only be read by setting it, so call
+    this from the main thread.
+    """
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def target_mode(path, default=None):
+    """``path``'s permission bits, or ``default`` (file_mode()) when it does not exist yet."""
+    try:
+        return os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        return file_mode() if default is None else default
+
+
+def temp_path(path, makedirs=False):
+    """A new empty temporary file in ``path``'s directory, named after it."""
+    directory, name = os.path.split(os.path.abspath(path))
+    if makedirs:
+        os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(suffix=os.path.splitext(name)[1], prefix=f".{name}.", dir=directory)
+    os.close(fd)
+    return tmp
+
+
+def replace(tmp, path, mode=None):
+    """Move the finished ``tmp`` over ``path``, keeping ``path``'s permissions."""
+    os.chmod(tmp, target_mode(path) if mode is None else mode)
+    os.replace(tmp, path)
+
+
+def discard(tmp):
+    if os.path.exists(tmp):
+        os.unlink(tmp)
+
+
+@contextmanager
+def staged(path, mode=None):
+    """Yield a temporary path that replaces ``path`` when the block succeeds."""
+    tmp = temp_path(path)
+    try:
+        yield tmp
+        replace(tmp, path, mode)
+    except BaseException:
+        discard(tmp)
+        raise
+
+
+def write_atomic(path, body, default_mode=None):
+    """Write ``body`` to ``path``, fsynced, through a temporary file renamed over it.
+
+    A new file gets ``default_mode`` (file_mode() if None); an existing
+    one keeps its permissions. Missing directories are created.
+    """
+    tmp = temp_path(path, makedirs=True)
+    try:
+        with open(tmp, "wb") as fp:
+            fp.write(body)
+            fp.flush()
+            os.fsync(fp.fileno())
+        replace(tmp, path, target_mode(path, default_mode))
+    except BaseException:
+        discard(tmp)
+        raise
+    return len(body)
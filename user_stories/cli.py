@@ -0,0 +1,561 @@
+"""Command line interface: ``python -m user_stories <command>``.
+
+    build     write the workbook (or CSV/JSONL/Markdown/Parquet exports)
+    watch     rebuild on every catalogue change, from a warm process
+    validate  report duplicate IDs, unknown roles, missing criteria, ...
+    stats     story counts by role and epic
+    trace     story ID <-> server handler links and coverage gaps
+    features  Cucumber .feature skeletons, one file per epic
+    diff      stories added, removed and modified between two catalogues
+    dedup     near-duplicate stories (MinHash/LSH)
+    search    ranked full-text search over stories and criteria
+    import    merge a hand-edited workbook back into the catalogue
+    serve     local HTTP service rendering filtered XLSX/CSV/JSON, cached
+    publish   render once, write every destination concurrently and atomically
+    list      one line per story
+
+Only ``build`` needs openpyxl. The writer modules are imported inside the
+command that uses them, so ``stats``, ``validate`` and ``list`` start without
+paying for it (see benchmarks/bench_startup.py for the budget).
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+
+from .loaders import DEFAULT_CATALOGUE, load_objects, load_stories
+
+DEFAULT_OUTPUT = "user_stories_acceptance_criteria.xlsx"
+COMMANDS = ("build", "watch", "validate", "stats", "trace", "features", "diff", "dedup", "search", "import", "serve",
+            "publish", "list")
+
+
+def _counted(stories, roles):
+    roles.clear()
+    for position, story in enumerate(stories, 1):
+        if not isinstance(story, dict):
+            raise ValueError(f"story #{position}: expected an object, got {type(story).__name__}")
+        roles[story["role"]] += 1
+        yield story
+
+
+def _build(args, outputs, roles):
+    """Render the catalogue to ``outputs``; returns ``(mode, status, total)``."""
+    output = outputs[0]
+    stories = _counted(load_stories(args.stories), roles)
+    status = None
+    if len(outputs) > 1 or not output.lower().endswith(".xlsx") or args.xlsx_backend == "raw":
+        from .writers import check_output, export
+        mode = "export"
+        if args.coverage:
+            raise SystemExit("--coverage needs a single .xlsx output and the openpyxl backend")
+        if args.by_epic or args.incremental:
+            raise SystemExit(f"--{'by-epic' if args.by_epic else 'incremental'} needs a single .xlsx output "
+                             "and the openpyxl backend")
+        if args.table and args.xlsx_backend == "raw":
+            raise SystemExit("--table needs the openpyxl backend")
+        if args.autofit and args.xlsx_backend == "openpyxl" and any(path.lower().endswith(".xlsx")
+                                                                    for path in outputs):
+            raise SystemExit("--autofit with several outputs needs --xlsx-backend raw")
+        try:
+            for path in outputs:
+                check_output(path, args.xlsx_backend, args.autofit, args.table)
+        except ValueError as error:
+            raise SystemExit(str(error)) from None
+        total = export(stories, outputs, args.xlsx_backend, args.autofit, args.table, args.compression,
+                       args.parallel_zip)
+    elif args.autofit and (args.incremental or args.by_epic or args.stream):
+        raise SystemExit("--autofit needs the in-memory build or --xlsx-backend raw")
+    elif args.coverage and (args.incremental or args.by_epic or args.stream):
+        raise SystemExit("--coverage needs the in-memory build")
+    elif args.table and (args.incremental or args.by_epic):
+        raise SystemExit("--table needs the in-memory or --stream build")
+    elif args.incremental:
+        from .incremental import write_workbook_incremental
+        mode = "incremental"
+        status, total = write_workbook_incremental(lambda: _counted(load_stories(args.stories), roles), output,
+                                                   args.compression, args.parallel_zip)
+    elif args.by_epic:
+        from .sharding import write_workbook_sharded
+        mode = "by-epic"
+        total = write_workbook_sharded(stories, output, args.workers, args.compression, args.parallel_zip)
+    elif args.stream:
+        from .workbook import write_workbook_streaming
+        mode = "stream"
+        total = write_workbook_streaming(stories, output, args.table, args.compression, args.parallel_zip)
+    else:
+        from .workbook import write_workbook
+        mode = "memory"
+        trace = None
+        if args.coverage:
+            from .trace import TraceIndex
+            trace = TraceIndex.from_source(args.server_src)
+        total = write_workbook(stories, output, args.autofit, trace, args.table, args.compression,
+                               args.parallel_zip)
+    return mode, status, total
+
+
+def cmd_build(args):
+    outputs = args.output or [DEFAULT_OUTPUT]
+    output = outputs[0]
+    roles = Counter()
+
+    profiler = None
+    if args.profile or args.cprofile:
+        from .profiling import Profiler
+        profiler = Profiler().start(cprofile=bool(args.cprofile))
+
+    try:
+        mode, status, total = _build(args, outputs, roles)
+    except ValueError as error:  # a malformed catalogue; validate lists every problem
+        raise SystemExit(f"error: {error}")
+    unchanged = status == "unchanged"  # incremental.UNCHANGED, without importing openpyxl here
+
+    if profiler is not None:
+        profiler.stop()
+        written = {path: os.path.getsize(path) for path in outputs if os.path.exists(path)}
+        if args.profile:
+            profiler.write(args.profile, mode=mode, status=status, stories=total, roles=dict(roles),
+                           outputs=written, bytes_written=0 if unchanged else sum(written.values()))
+        if args.cprofile:
+            profiler.dump_stats(args.cprofile)
+
+    if unchanged:
+        print(f"✓ No story changes, {output} is up to date ({total} stories)")
+        return 0
+
+    print(f"✓ User Stories and Acceptance Criteria created successfully!")
+    print(f"✓ Total Stories: {total}")
+    for path in outputs:
+        print(f"✓ File saved at: {path}")
+    print(f"\nBreakdown:")
+    print(f"  - User Stories: {roles['User']}")
+    print(f"  - Admin Stories: {roles['Admin']}")
+    return 0
+
+
+def cmd_watch(args):
+    import time
+
+    from .loaders import catalogue_hash
+    from .watch import watch
+
+    outputs = args.output or [DEFAULT_OUTPUT]
+    # a single openpyxl workbook is patched in place, only the changed rows are rewritten
+    args.incremental = (len(outputs) == 1 and outputs[0].lower().endswith(".xlsx")
+                        and args.xlsx_backend == "openpyxl"
+                        and not (args.by_epic or args.stream or args.autofit or args.coverage or args.table))
+    # warm the writer modules before the first edit
+    import openpyxl  # noqa: F401
+    from . import workbook  # noqa: F401
+    last = None
+
+    def rebuild():
+        nonlocal last
+        digest = catalogue_hash(args.stories)
+        if digest == last:
+            return
+        start = time.perf_counter()
+        mode, status, total = _build(args, outputs, Counter())
+        last = digest
+        print(f"✓ {time.strftime('%H:%M:%S')} {', '.join(map(str, outputs))}: {total} stories, "
+              f"{status or mode} in {time.perf_counter() - start:.2f}s", flush=True)
+
+    print(f"Watching {args.stories} (Ctrl+C to stop)", flush=True)
+    try:
+        watch([args.stories], rebuild, poll=args.poll, debounce=args.debounce)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def cmd_validate(args):
+    from .validation import Validator
+
+    validator = Validator()
+    shown = 0
+    for story in load_stories(args.stories):
+        for problem in validator.check(story):
+            if args.json:
+                print(json.dumps(problem.as_dict(), ensure_ascii=False))
+            elif args.limit is None or shown < args.limit:
+                print(f"{args.stories}: {problem}")
+            shown += 1
+    if args.json:
+        return 1 if validator.problems else 0
+    if args.limit is not None and shown > args.limit:
+        print(f"... {shown - args.limit} more not shown")
+    if validator.problems:
+        print(f"✗ {validator.problems} problems in {validator.total} stories")
+        return 1
+    print(f"✓ {validator.total} stories OK")
+    return 0
+
+
+def _label(value):
+    """``value`` as a Counter key; malformed values (lists, objects) are counted by their repr."""
+    return value if value is None or isinstance(value, (str, int, float)) else repr(value)
+
+
+def cmd_stats(args):
+    roles, epics = Counter(), Counter()
+    total = criteria = longest = 0
+    for story in load_objects(args.stories):
+        total += 1
+        roles[_label(story.get("role"))] += 1
+        epics[_label(story.get("epic"))] += 1
+        count = len(story.get("criteria") or ())
+        criteria += count
+        longest = max(longest, count)
+
+    if args.json:
+        json.dump({"stories": total, "criteria": criteria, "max_criteria": longest,
+                   "roles": dict(roles), "epics": dict(epics)}, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+        return 0
+
+    print(f"Stories: {total}")
+    print(f"Acceptance criteria: {criteria} ({criteria / total if total else 0:.1f} per story, max {longest})")
+    print("\nBy role:")
+    for role, count in roles.most_common():
+        print(f"  {count:>6}  {role}")
+    print("\nBy epic:")
+    for epic, count in epics.most_common():
+        print(f"  {count:>6}  {epic}")
+    return 0
+
+
+def cmd_list(args):
+    for story in load_objects(args.stories):
+        if args.role and story.get("role") != args.role:
+            continue
+        if args.epic and story.get("epic") != args.epic:
+            continue
+        print(f"{story.get('id', '?')}\t{story.get('role', '?')}\t{story.get('story', '')}")
+    return 0
+
+
+def cmd_trace(args):
+    from .trace import TraceIndex
+
+    index = TraceIndex.from_source(args.server_src)
+    for _ in index.tap(load_objects(args.stories)):
+        pass
+    if args.json:
+        json.dump(index.as_dict(), sys.stdout, indent=2, ensure_ascii=False)
+        print()
+        return 0
+
+    for story_id, handlers in index.story_handlers.items():
+        for handler in handlers:
+            where = index.definitions.get(handler, "not found")
+            routes = ", ".join(index.endpoints(handler))
+            print(f"{story_id}\t{handler}\t{where}" + (f"\t{routes}" if routes else ""))
+    gaps = 0
+    for story_id in index.stories_without_handler():
+        gaps += 1
+        print(f"✗ {story_id}: no handler")
+    for handler, story_ids in index.unknown_handlers().items():
+        gaps += 1
+        print(f"✗ {handler}: named by {', '.join(story_ids)} but not defined in the server sources")
+    for handler in index.handlers_without_story():
+        gaps += 1
+        print(f"✗ {handler} ({', '.join(index.endpoints(handler))}): no story")
+    if not gaps:
+        print(f"✓ {len(index.story_handlers)} stories traced, every route handler covered")
+    return 1 if gaps else 0
+
+
+def cmd_features(args):
+    from .gherkin import write_features
+
+    count, paths = write_features(load_objects(args.stories), args.output_dir)
+    print(f"✓ {count} scenarios written to {len(paths)} feature files in {args.output_dir}")
+    return 0
+
+
+def _short(value, limit=100):
+    text = str(value).replace("\n", " ")
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def cmd_diff(args):
+    from .diff import ADDED, REMOVED, CatalogueDiff
+
+    engine = CatalogueDiff(load_objects(args.old))
+    changes = engine.compare(load_objects(args.new))
+    if args.xlsx:
+        changes = list(changes)
+    for change in changes:
+        if args.json:
+            print(json.dumps(change.as_dict(), ensure_ascii=False))
+        elif change.kind == ADDED:
+            print(f"+ {change.story_id}  {_short(change.new)}")
+        elif change.kind == REMOVED:
+            print(f"- {change.story_id}  {_short(change.old)}")
+        elif change.field == "criteria order":
+            print(f"~ {change.story_id}  criteria reordered")
+        elif change.field == "criteria":
+            for line in change.old:
+                print(f"~ {change.story_id}  criteria - {_short(line)}")
+            for line in change.new:
+                print(f"~ {change.story_id}  criteria + {_short(line)}")
+        else:
+            print(f"~ {change.story_id}  {change.field}: {_short(change.old, 60)!r} -> {_short(change.new, 60)!r}")
+    if args.xlsx:
+        from .workbook import write_diff_workbook
+        write_diff_workbook(changes, args.xlsx)
+    counts = engine.counts
+    summary = (f"{counts['added']} added, {counts['removed']} removed, "
+               f"{counts['modified']} modified, {engine.unchanged} unchanged")
+    print(summary, file=sys.stderr if args.json else sys.stdout)
+    if args.xlsx:
+        print(f"✓ Diff saved at: {args.xlsx}", file=sys.stderr if args.json else sys.stdout)
+    return 0
+
+
+def cmd_dedup(args):
+    from .dedup import NearDuplicates
+
+    finder = NearDuplicates(args.threshold)
+    for story in load_objects(args.stories):
+        finder.add(story)
+    pairs = finder.pairs()
+    if args.limit is not None:
+        pairs = pairs[:args.limit]
+    if args.json:
+        for pair in pairs:
+            print(json.dumps(pair.as_dict()))
+        return 1 if pairs else 0
+
+    wanted = {story_id for pair in pairs for story_id in (pair.first, pair.second)}
+    texts = {str(story.get("id")): story.get("story") for story in load_stories(args.stories)
+             if isinstance(story, dict) and str(story.get("id")) in wanted}
+    for pair in pairs:
+        print(f"{pair.first} ~ {pair.second}  story {pair.story:.2f}  criteria {pair.criteria:.2f}")
+        print(f"  {_short(texts.get(pair.first, ''))}")
+        print(f"  {_short(texts.get(pair.second, ''))}")
+    print(f"{len(pairs)} near-duplicate pairs among {len(finder.ids)} stories (threshold {args.threshold})")
+    return 1 if pairs else 0
+
+
+def cmd_search(args):
+    import sqlite3
+
+    from .search import SearchIndex
+
+    index = SearchIndex(args.stories, args.index)
+    try:
+        if index.sync():
+            print(f"indexed {len(index)} stories ({index.added} new, {index.updated} changed, "
+                  f"{index.deleted} removed)", file=sys.stderr)
+        hits = index.search(" ".join(args.query), args.limit, args.raw)
+    except sqlite3.OperationalError as error:
+        if not args.raw:
+            raise
+        raise SystemExit(f"error: invalid FTS5 query: {error}")
+    finally:
+        index.close()
+    for hit in hits:
+        if args.json:
+            print(json.dumps(hit, ensure_ascii=False))
+            continue
+        print(f"{hit['id']:<8} {hit['score']:>6.2f}  {hit['role']:<6} {_short(hit['story'])}")
+        if hit["criteria"]:
+            print(f"{'':24}{_short(hit['criteria'])}")
+    if not hits:
+        print("no matching stories", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_import(args):
+    from .atomic import staged
+    from .importer import Merge, iter_workbook
+    from .loaders import dump_stories
+
+    output = args.output or args.stories
+    try:
+        merge = Merge(load_stories(args.stories))
+    except ValueError as error:
+        raise SystemExit(f"error: {error}")
+    with staged(output) as tmp:
+        count = dump_stories(merge.stories(iter_workbook(args.workbook)), tmp)
+    print(f"✓ {count} stories imported from {args.workbook} into {output} "
+          f"({len(merge.added)} new, {len(merge.removed)} removed)")
+    for label, ids in (("new", merge.added), ("removed", merge.removed)):
+        if ids:
+            print(f"  {label}: {', '.join(ids)}")
+    return 0
+
+
+def cmd_serve(args):
+    from .service import RenderCache, RenderService, make_server
+
+    service = RenderService(args.stories, RenderCache(args.cache_entries, args.cache_mb << 20))
+    server = make_server(service, args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"✓ Serving {args.stories} on http://{host}:{port}/render (Ctrl+C to stop)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+def cmd_publish(args):
+    import time
+
+    from .publish import Destination, load_destinations, publish
+
+    try:
+        destinations = [Destination.parse(text) for text in args.destinations]
+        if args.config:
+            destinations += load_destinations(args.config)
+    except ValueError as error:
+        raise SystemExit(f"error: {error}")
+    if not destinations:
+        raise SystemExit("error: no destinations; give paths or --config")
+    stories = list(load_stories(args.stories))
+    start = time.perf_counter()
+    try:
+        results = publish(stories, destinations, args.workers)
+    except ValueError as error:
+        raise SystemExit(f"error: {error}")
+    failed = 0
+    for written in results:
+        if written.ok:
+            print(f"✓ {written.path} ({written.size / 1024:,.0f} KB, {written.seconds:.2f}s)")
+        else:
+            failed += 1
+            print(f"✗ {written.path}: {written.error}", file=sys.stderr)
+    print(f"{len(results) - failed} of {len(results)} destinations written in {time.perf_counter() - start:.2f}s")
+    return 1 if failed else 0
+
+
+def _similarity(text):
+    value = float(text)
+    if not 0 < value <= 1:
+        raise argparse.ArgumentTypeError(f"{text} is not a similarity in (0, 1]")
+    return value
+
+
+def _build_options(sub):
+    sub.add_argument("-o", "--output", action="append",
+                     help="where to save the output; repeat to write several files in one pass "
+                          "(.xlsx, .csv, .jsonl, .md or .parquet; default: %s)" % DEFAULT_OUTPUT)
+    sub.add_argument("--stream", action="store_true",
+                     help="write rows as they are produced (constant memory, for very large backlogs)")
+    sub.add_argument("--incremental", action="store_true",
+                     help="only rewrite the rows whose story changed since the last run")
+    sub.add_argument("--by-epic", action="store_true",
+                     help="one sheet per epic, rendered in parallel, behind an index sheet")
+    sub.add_argument("--workers", type=int, help="worker processes for --by-epic (default: CPU count)")
+    sub.add_argument("--xlsx-backend", choices=["openpyxl", "raw"], default="openpyxl",
+                     help="'raw' streams SpreadsheetML straight into the zip, fastest for huge backlogs")
+    sub.add_argument("--autofit", action="store_true",
+                     help="size rows and columns to their content instead of the fixed layout")
+    sub.add_argument("--table", action="store_true",
+                     help="format the sheet as an Excel Table (autofilter, banding) coloured by "
+                          "conditional formatting on the role column instead of per-cell fills")
+    sub.add_argument("--compression", choices=["stored", "fast", "default", "max"], default="default",
+                     help="zip compression of .xlsx outputs: 'stored' saves fastest, 'max' makes the "
+                          "smallest file (default: default)")
+    sub.add_argument("--parallel-zip", action="store_true",
+                     help="deflate the worksheet parts of .xlsx outputs on all cores")
+    sub.add_argument("--coverage", action="store_true",
+                     help="add a sheet listing stories without a handler and route handlers without a story")
+    sub.add_argument("--server-src", help="server sources scanned for --coverage (default: server/src)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="user_stories",
+                                     description="User stories and acceptance criteria for StockZen.")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="command")
+
+    def command(name, func, help):
+        sub = commands.add_parser(name, help=help, description=help)
+        sub.add_argument("-s", "--stories", default=DEFAULT_CATALOGUE,
+                         help="story catalogue to read (.json, .jsonl or SQLite .db)")
+        sub.set_defaults(func=func)
+        return sub
+
+    build = command("build", cmd_build, "Create the user stories and acceptance criteria workbook.")
+    _build_options(build)
+    build.add_argument("--profile", metavar="REPORT.json",
+                       help="write a JSON report with row counts, bytes written and time per phase")
+    build.add_argument("--cprofile", metavar="STATS.prof",
+                       help="also capture cProfile data (top functions go into the --profile report)")
+
+    watch = command("watch", cmd_watch, "Rebuild whenever the catalogue changes, from a warm process.")
+    _build_options(watch)
+    watch.add_argument("--poll", type=float, default=0.1, help="seconds between checks (default: 0.1)")
+    watch.add_argument("--debounce", type=float, default=0.25,
+                       help="seconds the catalogue must stay unchanged before a rebuild (default: 0.25)")
+
+    validate = command("validate", cmd_validate, "Report every problem in the catalogue in one pass.")
+    validate.add_argument("--json", action="store_true", help="one JSON object per problem (JSONL)")
+    validate.add_argument("--limit", type=int, help="print at most this many problems (all are counted)")
+
+    stats = command("stats", cmd_stats, "Story counts by role and epic.")
+    stats.add_argument("--json", action="store_true", help="print the numbers as JSON")
+
+    trace = command("trace", cmd_trace, "Link story IDs to server handlers and report the gaps.")
+    trace.add_argument("--server-src", help="the server's src directory (default: server/src)")
+    trace.add_argument("--json", action="store_true", help="print the full index as JSON")
+
+    features = command("features", cmd_features, "Write Cucumber .feature skeletons, one file per epic.")
+    features.add_argument("output_dir", help="directory for the .feature files")
+
+    diff = commands.add_parser("diff", help="Stories added, removed and modified between two catalogues.",
+                               description="Stories added, removed and modified between two catalogues "
+                                           "(.json, .jsonl, .db or an old generator .py script).")
+    diff.add_argument("old", help="the earlier catalogue")
+    diff.add_argument("new", help="the later catalogue")
+    diff.add_argument("--json", action="store_true", help="one JSON object per change (JSONL)")
+    diff.add_argument("--xlsx", metavar="DIFF.xlsx", help="also write the changes as a highlighted sheet")
+    diff.set_defaults(func=cmd_diff)
+
+    dedup = command("dedup", cmd_dedup, "Report near-duplicate stories and criteria (MinHash/LSH).")
+    dedup.add_argument("--threshold", type=_similarity, default=0.6,
+                       help="estimated Jaccard similarity of story text or criteria to report (default: 0.6)")
+    dedup.add_argument("--limit", type=int, help="print at most this many pairs, most similar first")
+    dedup.add_argument("--json", action="store_true", help="one JSON object per pair (JSONL)")
+
+    search = command("search", cmd_search, "Ranked full-text search over stories and criteria.")
+    search.add_argument("query", nargs="+", help='words that must all match; "quoted phrase", prefix*')
+    search.add_argument("--limit", type=int, default=10, help="at most this many results (default: 10)")
+    search.add_argument("--raw", action="store_true", help="pass the query to SQLite FTS5 unchanged (OR, NOT, NEAR)")
+    search.add_argument("--index", help="index database (default: one per catalogue in the cache directory)")
+    search.add_argument("--json", action="store_true", help="one JSON object per result (JSONL)")
+
+    importing = command("import", cmd_import, "Merge a hand-edited workbook back into the catalogue.")
+    importing.add_argument("workbook", help="the edited .xlsx")
+    importing.add_argument("-o", "--output",
+                           help="catalogue to write (.json, .jsonl or .db; default: overwrite --stories)")
+
+    serve = command("serve", cmd_serve, "Serve filtered XLSX, CSV or JSON renders over local HTTP.")
+    serve.add_argument("--host", default="127.0.0.1", help="address to bind (default: 127.0.0.1)")
+    serve.add_argument("--port", type=int, default=8765, help="port to listen on (default: 8765; 0 picks one)")
+    serve.add_argument("--cache-entries", type=int, default=128, help="renders kept in memory (default: 128)")
+    serve.add_argument("--cache-mb", type=int, default=64, help="memory for cached renders in MB (default: 64)")
+
+    publishing = command("publish", cmd_publish, "Render once and write every destination concurrently.")
+    publishing.add_argument("destinations", nargs="*",
+                            help="output paths, optionally with filters: teams/admin.xlsx?role=Admin&epic=BILLING")
+    publishing.add_argument("--config", help="JSON list of destinations: [{\"path\": ..., \"role\": ...}, ...]")
+    publishing.add_argument("--workers", type=int, help="threads writing files (default: one per destination, up to 16)")
+
+    listing = command("list", cmd_list, "One line per story: ID, role and story text.")
+    listing.add_argument("--role", help="only stories for this role (e.g. User, Admin)")
+    listing.add_argument("--epic", help="only stories in this epic")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,174 @@
+"""Zip compression settings for the XLSX writers.
+
+An .xlsx is a zip archive, and deflating the worksheet XML is a large
+share of save time on big backlogs. Every XLSX writer takes one of
+``LEVELS``:
+
+    stored   no compression; fastest save, largest file
+    fast     deflate level 1
+    default  deflate level 6, what openpyxl and zipfile use
+    max      deflate level 9; smallest file, slowest save
+
+With ``parallel`` the worksheet parts are deflated on a thread pool, the
+way pigz does it. The part is cut into CHUNK_SIZE slices, and each slice
+is compressed on its own, primed with the previous slice's last 32 KiB as
+the dictionary. Every slice but the last ends on a sync flush, so the
+pieces concatenate into one valid deflate stream. zlib releases the GIL,
+so the slices really do compress side by side. The CRC is computed over
+the slices in order on the calling thread. The result reads like any
+other deflated member, a little larger because the slices are
+compressed independently.
+
+zipfile has no API for adding data that is already compressed. Such
+members are written the way ZipFile.open(..., "w") writes them: a local
+header, the data, then the header again with the real sizes and CRC. The
+member is then recorded in the archive's file list.
+"""
+
+import os
+import time
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+LEVELS = {
+    "stored": (zipfile.ZIP_STORED, None),
+    "fast": (zipfile.ZIP_DEFLATED, 1),
+    "default": (zipfile.ZIP_DEFLATED, 6),
+    "max": (zipfile.ZIP_DEFLATED, 9),
+}
+DEFAULT = "default"
+CHUNK_SIZE = 1 << 20
+WINDOW = 1 << 15
+WORKSHEETS = "xl/worksheets/sheet"
+
+
+def zip_settings(compression=DEFAULT):
+    """``(compress_type, compresslevel)`` for a LEVELS name."""
+    try:
+        return LEVELS[compression]
+    except KeyError:
+        raise ValueError(f"unknown compression {compression!r}, expected one of {', '.join(LEVELS)}") from None
+
+
+def open_zip(path, compression=DEFAULT):
+    compress_type, level = zip_settings(compression)
+    return zipfile.ZipFile(path, "w", compress_type, allowZip64=True, compresslevel=level)
+
+
+def _deflate(data, level, zdict, last):
+    options = {"zdict": zdict} if zdict else {}
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15, **options)
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+def _chunks(sources):
+    """The bytes and binary files in ``sources``, one after another, in slices of at most CHUNK_SIZE."""
+    for source in sources:
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            view = memoryview(source)
+            yield from (bytes(view[n:n + CHUNK_SIZE]) for n in range(0, len(view), CHUNK_SIZE))
+            continue
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+            yield chunk
+
+
+def write_parallel(zf, name, sources, size, level, pool, in_flight):
+    """Add the concatenation of ``sources`` (bytes or binary files, ``size`` bytes in all) to ``zf``.
+
+    The data is deflated on ``pool``. At most ``in_flight`` compressed
+    slices wait to be written, which bounds memory.
+    """
+    zinfo = zipfile.ZipInfo(name, date_time=time.localtime(time.time())[:6])
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+    zinfo.external_attr = 0o600 << 16
+    zinfo.CRC = zinfo.compress_size = 0
+    zinfo.file_size = size
+    zip64 = size * 1.05 > zipfile.ZIP64_LIMIT
+    fp = zf.fp
+    zinfo.header_offset = fp.tell()
+    fp.write(zinfo.FileHeader(zip64))
+
+    crc = written = 0
+    pending = []
+    previous = b""
+    tail = None
+    for chunk in _chunks(sources):
+        if previous:
+            pending.append(pool.submit(_deflate, previous, level, tail, False))
+            tail = previous[-WINDOW:]
+        previous = chunk
+        crc = zlib.crc32(chunk, crc)
+        written += len(chunk)
+        while len(pending) >= in_flight:
+            zinfo.compress_size += fp.write(pending.pop(0).result())
+    pending.append(pool.submit(_deflate, previous, level, tail, True))
+    for future in pending:
+        zinfo.compress_size += fp.write(future.result())
+
+    zinfo.CRC = crc
+    zinfo.file_size = written
+    end = fp.tell()
+    fp.seek(zinfo.header_offset)
+    fp.write(zinfo.FileHeader(zip64))
+    fp.seek(end)
+    zf.filelist.append(zinfo)
+    zf.NameToInfo[name] = zinfo
+    zf.start_dir = end
+    zf._didModify = True  # so close() writes the central directory
+
+
+class ParallelArchive:
+    """A ZipFile stand-in for openpyxl's ExcelWriter that deflates worksheets in parallel.
+
+    Worksheet parts go through write_parallel. Everything else is small
+    and passed to the real archive.
+    """
+
+    def __init__(self, zf, level, workers=None):
+        self.zf = zf
+        self.level = level
+        workers = workers or os.cpu_count() or 1
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.in_flight = 2 * workers
+
+    def _write(self, name, source, size):
+        write_parallel(self.zf, name, source, size, self.level, self.pool, self.in_flight)
+
+    def writestr(self, name, data):
+        if not name.startswith(WORKSHEETS):
+            return self.zf.writestr(name, data)
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self._write(name, [data], len(data))
+
+    def write(self, filename, arcname):
+        if not arcname.startswith(WORKSHEETS):
+            return self.zf.write(filename, arcname)
+        with open(filename, "rb") as fp:
+            self._write(arcname, [fp], os.path.getsize(filename))
+
+    def namelist(self):
+        return self.zf.namelist()
+
+    def close(self):
+        self.pool.shutdown()
+        self.zf.close()
+
+
+def save_workbook(wb, path, compression=DEFAULT, parallel=False):
+    """``wb.save(path)`` with a choice of compression (as openpyxl's save_workbook does it)."""
+    import datetime
+
+    from openpyxl.writer.excel import ExcelWriter
+
+    if compression == DEFAULT and not parallel:
+        wb.save(path)
+        return
+    if wb.write_only and not wb.worksheets:
+        wb.create_sheet()
+    wb.properties.modified = datetime.datetime.now(tz=datetime.timezone.utc).replace(tzinfo=None)
+    zf = open_zip(path, compression)
+    compress_type, level = zip_settings(compression)
+    archive = ParallelArchive(zf, level) if parallel and compress_type == zipfile.ZIP_DEFLATED else zf
+    ExcelWriter(wb, archive).save()
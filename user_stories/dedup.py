@@ -0,0 +1,197 @@
+"""Near-duplicate stories via MinHash signatures and locality-sensitive hashing.
+
+Each story gets two MinHash signatures. One covers the story text with its
+"As a user, I want" prefix removed, so stories that differ only by role
+line up. The other covers the acceptance criteria. The shingles are word
+bigrams, taken within a line.
+
+Comparing every pair is O(n²). LSH instead cuts each signature into
+``bands`` of ``rows`` values and puts stories with an identical band in
+the same bucket. Only stories sharing a bucket become candidates, and each
+candidate's Jaccard similarity is then estimated from the signatures. The
+band count and width come from the threshold, so pairs at the threshold are
+found with high probability and dissimilar ones almost never collide.
+
+Signatures are stored flat in ``array("I")`` (256 bytes per story and
+field), and buckets are built one band at a time, so peak memory is the
+signatures plus one band's dict. A shingle's NUM_PERM hash values are the
+4-byte words of a single SHAKE-128 digest, one C call instead of NUM_PERM
+multiply-mod steps in Python. They are cached, because the same bigrams
+recur across a catalogue, and a story's signature is the element-wise min
+of its shingles' rows.
+
+    python -m user_stories dedup [--threshold 0.6] [--json]
+"""
+
+import hashlib
+import re
+import struct
+from array import array
+from itertools import combinations
+
+NUM_PERM = 64
+THRESHOLD = 0.6
+RECALL_MARGIN = 0.1
+FIELDS = ("story", "criteria")
+SHINGLE_CACHE = 100_000
+MAX_BUCKET = 200
+
+_EMPTY = 0xFFFFFFFF
+_PREFIX = re.compile(r"^\s*as an?\s+[^,]*?,?\s+i want\s+(?:to\s+)?", re.I)
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _bucket_pairs(members):
+    """Every pair in a bucket, or for one over MAX_BUCKET stories, every pair
+    among its first MAX_BUCKET and each later story with the first."""
+    head = members[:MAX_BUCKET]
+    yield from combinations(head, 2)
+    first = members[0]
+    for n in members[MAX_BUCKET:]:
+        yield first, n
+
+
+def lsh_bands(threshold=THRESHOLD, num_perm=NUM_PERM):
+    """``(bands, rows)`` whose collision threshold sits just under ``threshold``.
+
+    Two stories with Jaccard similarity s share at least one bucket with
+    probability 1 - (1 - s**rows)**bands. That curve turns around
+    (1/bands)**(1/rows); the widest bands that keep it RECALL_MARGIN below
+    the threshold are picked.
+    """
+    if not 0 < threshold <= 1:
+        raise ValueError(f"threshold must be in (0, 1], got {threshold}")
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold - RECALL_MARGIN:
+            best = (bands, rows)
+    return best
+
+
+def _shingles(lines):
+    shingles = set()
+    for line in lines:
+        words = _WORD.findall(line.lower())
+        if len(words) == 1:
+            shingles.add(words[0])
+        shingles.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    return shingles
+
+
+def story_shingles(story):
+    return _shingles([_PREFIX.sub("", str(story.get("story") or ""))])
+
+
+def criteria_shingles(story):
+    return _shingles(map(str, story.get("criteria") or ()))
+
+
+class Pair:
+    """Two near-duplicate stories with the estimated similarity of each field."""
+
+    __slots__ = ("first", "second", "story", "criteria")
+
+    def __init__(self, first, second, story, criteria):
+        self.first = first
+        self.second = second
+        self.story = story
+        self.criteria = criteria
+
+    @property
+    def score(self):
+        return max(self.story, self.criteria)
+
+    def as_dict(self):
+        return {"ids": [self.first, self.second], "story": self.story, "criteria": self.criteria}
+
+
+class NearDuplicates:
+    """Collects story signatures, then reports the pairs above ``threshold``.
+
+    A pair is reported when its story text or its criteria reach the
+    threshold; both similarities are given.
+    """
+
+    def __init__(self, threshold=THRESHOLD, num_perm=NUM_PERM):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = lsh_bands(threshold, num_perm)
+        self.unpack = struct.Struct(f"<{num_perm}I").unpack
+        self.ids = []
+        self.signatures = {field: array("I") for field in FIELDS}
+        self.empty = tuple([_EMPTY] * num_perm)
+        self.empty_bytes = array("I", self.empty).tobytes()
+        self.cache = {}
+
+    def _row(self, shingle):
+        # digests are cached as bytes: 256 bytes each and no work for the GC
+        digest = self.cache.get(shingle)
+        if digest is None:
+            if len(self.cache) >= SHINGLE_CACHE:
+                self.cache.clear()
+            digest = self.cache[shingle] = hashlib.shake_128(shingle.encode("utf-8")).digest(4 * self.num_perm)
+        return self.unpack(digest)
+
+    def signature(self, shingles):
+        if not shingles:
+            return self.empty
+        return map(min, zip(*map(self._row, shingles)))
+
+    def add(self, story):
+        self.ids.append(str(story.get("id")))
+        self.signatures["story"].extend(self.signature(story_shingles(story)))
+        self.signatures["criteria"].extend(self.signature(criteria_shingles(story)))
+
+    def _candidates(self, field):
+        signatures, num_perm, rows = self.signatures[field], self.num_perm, self.rows
+        empty = array("I", self.empty[:rows]).tobytes()
+        candidates = set()
+        for band in range(self.bands):
+            buckets = {}
+            offset = band * rows
+            for n in range(len(self.ids)):
+                start = n * num_perm + offset
+                key = signatures[start:start + rows].tobytes()
+                if key == empty:  # no shingles, nothing to compare
+                    continue
+                buckets.setdefault(key, []).append(n)
+            for members in buckets.values():
+                if len(members) > 1:
+                    candidates.update(_bucket_pairs(members))
+        return candidates
+
+    def _similarity(self, field, first, second):
+        signatures, num_perm = self.signatures[field], self.num_perm
+        a = signatures[first * num_perm:(first + 1) * num_perm]
+        b = signatures[second * num_perm:(second + 1) * num_perm]
+        if a.tobytes() == self.empty_bytes:
+            return 0.0
+        return sum(x == y for x, y in zip(a, b)) / num_perm
+
+    def pairs(self):
+        """Near-duplicate pairs, most similar first.
+
+        Every pair of stories sharing a bucket is compared. A bucket over
+        MAX_BUCKET stories (a catalogue full of one template) is capped: its
+        later stories are only paired with the first, which keeps it linear
+        instead of quadratic.
+        """
+        candidates = set()
+        for field in FIELDS:
+            candidates |= self._candidates(field)
+        pairs = []
+        for first, second in candidates:
+            story = self._similarity("story", first, second)
+            criteria = self._similarity("criteria", first, second)
+            if max(story, criteria) >= self.threshold:
+                pairs.append(Pair(self.ids[first], self.ids[second], round(story, 2), round(criteria, 2)))
+        pairs.sort(key=lambda pair: (-pair.score, pair.first, pair.second))
+        return pairs
+
+
+def near_duplicates(stories, threshold=THRESHOLD):
+    finder = NearDuplicates(threshold)
+    for story in stories:
+        finder.add(story)
+    return finder.pairs()
@@ -0,0 +1,134 @@
+"""Differences between two versions of a story catalogue.
+
+Any two sources load_stories reads can be compared, including the old
+generator scripts under .history/. The old version is indexed once by
+story ID, keeping a content hash and a compact record per story. The new
+version is then streamed past that index. Unchanged stories are skipped on
+a hash match, and only modified ones are compared field by field. Whatever
+is left in the index afterwards was removed. That is O(n) over both
+versions, with one catalogue held in memory as records.Story.
+
+A catalogue may repeat an ID (``validate`` reports it). Stories are
+therefore keyed by ID and occurrence: the second US-7 in the old version
+is compared with the second US-7 in the new one.
+
+    python -m user_stories diff OLD NEW [--json] [--xlsx DIFF.xlsx]
+"""
+
+import hashlib
+from collections import Counter
+
+from .records import Story
+
+ADDED = "added"
+REMOVED = "removed"
+MODIFIED = "modified"
+FIELDS = ("role", "epic", "story")
+
+
+def content_hash(story):
+    """Hash of a story's fields, ID included.
+
+    Fields are joined with the ASCII unit and record separators instead of
+    JSON-encoded, which is several times faster. Text containing those
+    control characters could collide, but the XLSX writers reject it anyway.
+    """
+    payload = "\x1f".join((str(story.get("id")), str(story.get("role")), str(story.get("epic")),
+                           str(story.get("story")), "\x1e".join(map(str, story.get("criteria") or ()))))
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).digest()
+
+
+class Change:
+    """One difference: a whole story added or removed, or one field of a modified story.
+
+    For criteria, ``old`` and ``new`` are the lines only in the old and only
+    in the new version.
+    """
+
+    __slots__ = ("kind", "story_id", "field", "old", "new")
+
+    def __init__(self, kind, story_id, field=None, old=None, new=None):
+        self.kind = kind
+        self.story_id = story_id
+        self.field = field
+        self.old = old
+        self.new = new
+
+    def as_dict(self):
+        return {"kind": self.kind, "id": self.story_id, "field": self.field, "old": self.old, "new": self.new}
+
+
+def _criteria_changes(story_id, old, new):
+    old, new = list(old or ()), list(new or ())
+    if old == new:
+        return []
+    old_counts, new_counts = Counter(old), Counter(new)
+    if old_counts == new_counts:
+        return [Change(MODIFIED, story_id, "criteria order", old, new)]
+    # multisets, so dropping one of two identical lines counts as a removal
+    return [Change(MODIFIED, story_id, "criteria", _surplus(old, old_counts - new_counts),
+                   _surplus(new, new_counts - old_counts))]
+
+
+def _surplus(lines, extra):
+    """The lines counted in ``extra``, in their order in ``lines``."""
+    kept = []
+    for line in lines:
+        if extra[line] > 0:
+            extra[line] -= 1
+            kept.append(line)
+    return kept
+
+
+def story_changes(old, new):
+    """Field-level changes between two versions of the same story."""
+    story_id = new.get("id")
+    changes = [Change(MODIFIED, story_id, field, old.get(field), new.get(field))
+               for field in FIELDS if old.get(field) != new.get(field)]
+    return changes + _criteria_changes(story_id, old.get("criteria"), new.get("criteria"))
+
+
+def _keys():
+    """A function giving each story its ``(id, occurrence)`` index key, in catalogue order."""
+    seen = Counter()
+
+    def key(story):
+        story_id = story.get("id")
+        if not isinstance(story_id, (str, int, type(None))):
+            story_id = repr(story_id)
+        occurrence = seen[story_id]
+        seen[story_id] += 1
+        return story_id, occurrence
+    return key
+
+
+class CatalogueDiff:
+    """Indexes the old catalogue, then compares a stream of new stories against it."""
+
+    def __init__(self, old_stories):
+        self.index = {}
+        key = _keys()
+        for story in old_stories:
+            self.index[key(story)] = (content_hash(story), Story.from_dict(story))
+        self.unchanged = 0
+        self.counts = {ADDED: 0, REMOVED: 0, MODIFIED: 0}
+
+    def compare(self, new_stories):
+        """Yield the changes, in new-catalogue order, then the removed stories."""
+        index = self.index
+        key = _keys()
+        for story in new_stories:
+            entry = index.pop(key(story), None)
+            if entry is None:
+                self.counts[ADDED] += 1
+                yield Change(ADDED, story.get("id"), new=story.get("story"))
+            elif entry[0] == content_hash(story):
+                self.unchanged += 1
+            else:
+                self.counts[MODIFIED] += 1
+                yield from story_changes(entry[1], story)
+        for (story_id, _), (_, old) in index.items():
+            self.counts[REMOVED] += 1
+            yield Change(REMOVED, story_id, old=old.story)
+        index.clear()
+
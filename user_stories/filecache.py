@@ -0,0 +1,71 @@
+"""Persistent per-file cache for results derived from source files.
+
+Entries are keyed on the file's absolute path and reused while its mtime and
+size are unchanged. When only the mtime moved the content hash is checked
+before the file is parsed again.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", "~/.cache")).expanduser() / "stockzen-user-stories"
+
+
+class FileCache:
+    """JSON-backed map from a source file to a value parsed from it.
+
+    ``version`` is stored with the cache; bump it when the parser changes so
+    old results are discarded.
+    """
+
+    def __init__(self, name, version=1, directory=CACHE_DIR):
+        self.path = Path(directory) / f"{name}.json"
+        self.version = version
+        self.entries = {}
+        self.dirty = False
+        self.hits = self.misses = 0
+        try:
+            with open(self.path, encoding="utf-8") as fp:
+                data = json.load(fp)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == version:
+            self.entries = data.get("entries", {})
+
+    def get(self, path, parse):
+        """The cached value for ``path``, or ``parse(text)`` if it changed."""
+        path = Path(path).resolve()
+        key = str(path)
+        stat = path.stat()
+        entry = self.entries.get(key)
+        if entry is not None and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            self.hits += 1
+            return entry["value"]
+
+        raw = path.read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+        self.dirty = True
+        if entry is not None and entry["sha256"] == digest:
+            entry["mtime_ns"] = stat.st_mtime_ns
+            entry["size"] = stat.st_size
+            self.hits += 1
+            return entry["value"]
+
+        self.misses += 1
+        value = parse(raw.decode("utf-8"))
+        self.entries[key] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size,
+                             "sha256": digest, "value": value}
+        return value
+
+    def save(self):
+        """Write the cache back if anything changed."""
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as fp:
+            json.dump({"version": self.version, "entries": self.entries}, fp, separators=(",", ":"))
+        os.replace(tmp, self.path)
+        self.dirty = False
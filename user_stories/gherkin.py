@@ -0,0 +1,109 @@
+"""GIVEN/WHEN/THEN structure of acceptance criteria and Gherkin export.
+
+Every criterion line is matched once against ``STEP``, which splits off a
+leading GIVEN/WHEN/THEN/AND/BUT keyword. "AND WHEN ..." counts as a WHEN
+step. Lines without a keyword come back with step ``None`` and become
+``*`` steps in Gherkin.
+
+``FeatureWriter`` turns a story stream into Cucumber ``.feature`` files,
+one per epic, writing each scenario as its story arrives. Only the open
+file handle per epic is kept; stories are never collected.
+
+    python -m user_stories features OUT_DIR
+"""
+
+import re
+from pathlib import Path
+
+STEP = re.compile(
+    r"\s*(?:(?P<conjunction>AND|BUT)\b\s*)?(?P<keyword>GIVEN|WHEN|THEN)?\b[\s:,]*(?P<text>.*)",
+    re.I | re.S,
+)
+KEYWORDS = {"GIVEN": "Given", "WHEN": "When", "THEN": "Then", "AND": "And", "BUT": "But", None: "*"}
+DEFAULT_EPIC = "Stories"
+
+_SLUG = re.compile(r"[^a-z0-9]+")
+_SPACES = re.compile(r"\s+")
+
+
+def parse_criterion(line):
+    """``(step, text)`` for one criterion; step is None for free text."""
+    match = STEP.match(line)
+    keyword = match.group("keyword") or match.group("conjunction")
+    if keyword is None:
+        return None, line.strip()
+    return keyword.upper(), match.group("text").strip()
+
+
+def parse_criteria(criteria):
+    return [parse_criterion(line) for line in criteria]
+
+
+def feature_name(epic):
+    """File name for an epic: "PRODUCT MANAGEMENT - ADMIN" -> "product_management_admin.feature"."""
+    return (_SLUG.sub("_", epic.lower()).strip("_") or "stories") + ".feature"
+
+
+def _tag(value):
+    return "@" + _SPACES.sub("_", str(value))
+
+
+class FeatureWriter:
+    """Writer backend that streams scenarios into one .feature file per epic."""
+
+    def __init__(self, output_dir):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.files = {}
+        self.names = set()
+        self.paths = []
+
+    def _file(self, epic):
+        fp = self.files.get(epic)
+        if fp is None:
+            name = feature_name(epic)
+            stem, n = name[:-len(".feature")], 1
+            while name in self.names:  # two epics with the same slug
+                n += 1
+                name = f"{stem}_{n}.feature"
+            self.names.add(name)
+            path = self.output_dir / name
+            self.paths.append(path)
+            fp = self.files[epic] = open(path, "w", encoding="utf-8")
+            fp.write(f"Feature: {epic}\n")
+        return fp
+
+    def write_header(self, headers):
+        pass
+
+    def write_row(self, values, story):
+        fp = self._file(str(story.get("epic") or DEFAULT_EPIC))
+        lines = [
+            "",
+            f"  {_tag(story['id'])} {_tag(story['role'].lower())}",
+            f"  Scenario: {story['id']} {story['story']}",
+        ]
+        for step, text in parse_criteria(story["criteria"]):
+            lines.append(f"    {KEYWORDS[step]} {text}")
+        fp.write("\n".join(lines) + "\n")
+
+    def close(self):
+        for fp in self.files.values():
+            fp.close()
+        self.files = {}
+
+
+def write_features(stories, output_dir):
+    """Write ``stories`` as .feature files under ``output_dir``.
+
+    Returns ``(count, paths)``: the number of stories and the files written.
+    """
+    writer = FeatureWriter(output_dir)
+    count = 0
+    try:
+        for story in stories:
+            writer.write_row(None, story)
+            count += 1
+    finally:
+        writer.close()
+    return count, writer.paths
@@ -0,0 +1,162 @@
+"""Read stories back from a workbook edited by hand.
+
+The workbook is opened with openpyxl in read-only mode and walked with
+``iter_rows(values_only=True)``, so rows are parsed as the XML streams past
+and never collected. (openpyxl's reader still keeps the height of each row
+it has seen, about half a kilobyte per row.) Every sheet whose first row
+is the standard header is read. The coverage and index sheets are
+skipped, and a --by-epic workbook gives one story stream across its epic
+sheets.
+
+Column B holds rows.story_text's "As a user I want ..." rewrite.
+``original_story`` turns it back into the catalogue wording "As a user,
+I want ...". The workbook has no epic or handlers column, so ``Merge``
+takes those from the catalogue the workbook was built from, matched by
+story ID. A row whose column B still equals the rewrite of the catalogue
+story keeps the catalogue text as it was.
+
+``Merge`` indexes only what the sheet cannot supply: the key order, the
+values of the keys outside the sheet's columns (epic, handlers, ...), the
+role and a hash of the rewritten text. The story text itself is kept
+only in the rare case that original_story() would not restore it.
+
+    python -m user_stories import EDITED.xlsx [-s CATALOGUE] [-o OUTPUT]
+"""
+
+import hashlib
+import re
+from sys import intern
+
+from .rows import HEADERS, story_text
+
+_STORY_TEXT = re.compile(r"\s*As an?\s+(?P<who>.+?),?\s+I want\b\s*(?P<rest>.*)", re.S)
+
+
+def original_story(text, role):
+    """Undo rows.story_text: "As a admin I want X" -> "As an admin, I want X".
+
+    Text without "I want" is returned stripped, for validation to report.
+    """
+    match = _STORY_TEXT.match(text)
+    if match is None:
+        return text.strip()
+    who = match.group("who").strip() or str(role).lower()
+    article = "an" if who[:1].lower() in "aeio" else "a"  # "a user", "an admin"
+    return f"As {article} {who}, I want {match.group('rest').strip()}"
+
+
+def _text(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _criteria(value):
+    return [line.strip() for line in _text(value).replace("\r\n", "\n").split("\n") if line.strip()]
+
+
+def iter_workbook(path):
+    """Yield ``{"id", "role", "story", "criteria"}`` for every row of an edited workbook.
+
+    ``story`` is still column B's wording; Merge or original_story()
+    turns it back into the catalogue text. Blank rows are skipped.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            rows = ws.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None or [_text(cell) for cell in header[:len(HEADERS)]] != HEADERS:
+                continue
+            for row in rows:
+                story_id, text, role, criteria = (tuple(row) + (None,) * len(HEADERS))[:len(HEADERS)]
+                story_id = _text(story_id)
+                if not story_id:
+                    continue
+                yield {"id": story_id, "role": _text(role), "story": _text(text), "criteria": _criteria(criteria)}
+    finally:
+        wb.close()
+
+
+# the columns a row supplies; everything else comes from the catalogue
+ROW_KEYS = frozenset({"id", "role", "story", "criteria"})
+
+
+def _digest(text):
+    return None if text is None else hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+class _Base:
+    """What a catalogue story adds to its row: the rest of its keys, and how to recognise its text."""
+
+    __slots__ = ("keys", "extra", "role", "digest", "story")
+
+    def __init__(self, story, key_orders):
+        keys = tuple(story.keys())
+        self.keys = key_orders.setdefault(keys, keys)  # one shared tuple per key order
+        self.extra = tuple(intern(value) if type(value) is str else value
+                           for key, value in story.items() if key not in ROW_KEYS)
+        self.role = story.get("role")
+        if type(self.role) is str:
+            self.role = intern(self.role)
+        rewritten = _rewritten(story)
+        self.digest = _digest(rewritten)
+        text = story.get("story")
+        self.story = None if rewritten is not None and original_story(rewritten, self.role) == text else text
+
+    def merged(self, row):
+        extra = iter(self.extra)
+        story = {}
+        for key in self.keys:
+            story[key] = row[key] if key in ROW_KEYS else next(extra)
+        story["role"] = row["role"]
+        if self.role != row["role"] or self.digest is None or self.digest != _digest(row["story"]):
+            story["story"] = original_story(row["story"], row["role"])
+        else:  # column B untouched: the catalogue text as it was
+            story["story"] = self.story if self.story is not None else original_story(row["story"], self.role)
+        story["criteria"] = row["criteria"]
+        return story
+
+
+class Merge:
+    """Edited rows laid over the catalogue they were built from.
+
+    The catalogue is indexed once by ID, keeping a small _Base per story;
+    the edited rows then stream past. ``added`` and ``removed`` are filled
+    in as the merge runs: rows whose ID the catalogue lacks, and catalogue
+    stories no row mentions.
+    """
+
+    def __init__(self, catalogue):
+        key_orders = {}
+        self.index = {}
+        for position, story in enumerate(catalogue, 1):
+            # the catalogue is rewritten, so an entry cannot just be skipped
+            if not isinstance(story, dict):
+                raise ValueError(f"story #{position}: expected an object, got {type(story).__name__}")
+            self.index[story.get("id")] = _Base(story, key_orders)
+        self.added = []
+        self.removed = []
+
+    def stories(self, rows):
+        index = self.index
+        for row in rows:
+            base = index.pop(row["id"], None)
+            if base is None:
+                self.added.append(row["id"])
+                yield {**row, "story": original_story(row["story"], row["role"])}
+                continue
+            yield base.merged(row)
+        self.removed.extend(index)
+        index.clear()
+
+
+def _rewritten(story):
+    try:
+        return story_text(story)
+    except (ValueError, KeyError, AttributeError, TypeError):
+        return None
@@ -0,0 +1,236 @@
+"""Incremental regeneration of the acceptance criteria workbook.
+
+A manifest next to the output records a content hash for every story row.
+On the next run the catalogue is hashed in one streaming pass and compared
+with it:
+
+* nothing changed -> the workbook is not touched at all;
+* some rows changed, were appended or dropped from the end -> only those
+  rows are rendered, and the rest of the worksheet is copied over from the
+  existing workbook (see _patch);
+* anything else (no manifest, most rows changed, the workbook was edited or
+  removed since the last run) -> the workbook is rebuilt with the streaming
+  writer.
+
+A patch never loads the workbook into openpyxl. The old ``sheet1.xml`` is
+streamed and split on ``</row>``, so unchanged rows are copied as bytes
+and only the changed ones go through openpyxl's cell writer. The new
+package is written to a temporary file and renamed over the old one.
+"""
+
+import hashlib
+import json
+import os
+import re
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+from . import atomic
+from .compression import CHUNK_SIZE, DEFAULT, open_zip, write_parallel, zip_settings
+from .profiling import span
+from .workbook import new_workbook, write_story_row, write_workbook_streaming
+from .xlsxzip import sheet_part
+
+MANIFEST_SUFFIX = ".manifest.json"
+# Bump whenever the rendering of a row changes, so old manifests are ignored.
+RENDER_VERSION = 1
+# Share of the rows that may change before a full rebuild becomes the
+# cheaper option; a patch still inflates and deflates the whole sheet.
+PATCH_FRACTION = 0.5
+
+UNCHANGED = "unchanged"
+PATCHED = "patched"
+REBUILT = "rebuilt"
+
+
+def story_hash(story):
+    """Hash of everything that ends up in a story's row."""
+    payload = json.dumps([story["id"], story["role"], story["story"], story["criteria"]],
+                         ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def manifest_path(output_path):
+    return Path(f"{output_path}{MANIFEST_SUFFIX}")
+
+
+def read_manifest(output_path):
+    """The manifest for ``output_path``, or None if it is missing or stale."""
+    try:
+        with open(manifest_path(output_path), encoding="utf-8") as fp:
+            manifest = json.load(fp)
+        stat = os.stat(output_path)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("render") != RENDER_VERSION:
+        return None
+    # the workbook was edited or replaced behind our back
+    if manifest.get("output") != [stat.st_mtime_ns, stat.st_size]:
+        return None
+    return manifest
+
+
+def write_manifest(output_path, hashes):
+    stat = os.stat(output_path)
+    manifest = {
+        "render": RENDER_VERSION,
+        "output": [stat.st_mtime_ns, stat.st_size],
+        "stories": hashes,
+    }
+    path = manifest_path(output_path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as fp:
+        json.dump(manifest, fp, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def _rebuild(open_stories, output_path, compression, parallel):
+    hashes = []
+
+    def hashed(stories):
+        for story in stories:
+            hashes.append(story_hash(story))
+            yield story
+
+    write_workbook_streaming(hashed(open_stories()), output_path, compression=compression, parallel=parallel)
+    write_manifest(output_path, hashes)
+    return REBUILT, len(hashes)
+
+
+_ROW = re.compile(rb'<row r="(\d+)"')
+
+
+class RowRenderer:
+    """Renders single story rows as ``<row>`` XML, the way openpyxl saves them.
+
+    Uses a scratch workbook with the looks registered in the usual order,
+    so the style ids match the rest of the sheet. Each row's cells are
+    dropped again once it is rendered.
+    """
+
+    def __init__(self):
+        from openpyxl import LXML
+        from openpyxl.cell._writer import etree_write_cell, lxml_write_cell
+
+        self.ws = new_workbook().active
+        self.write_cell = lxml_write_cell if LXML else etree_write_cell
+
+    def __call__(self, row, story):
+        from openpyxl.xml.functions import xmlfile
+
+        ws = self.ws
+        write_story_row(ws, row, story)
+        cells = [ws._cells.pop((row, col)) for col in range(1, 5)]
+        attrs = {"r": str(row)}
+        attrs.update(ws.row_dimensions.pop(row))
+        out = BytesIO()
+        with xmlfile(out) as xf:
+            with xf.element("row", attrs):
+                for cell in cells:
+                    self.write_cell(xf, ws, cell, cell.has_style)
+        return out.getvalue()
+
+
+def _pieces(fp):
+    """A sheet part split after every ``</row>``; the last piece is the tail."""
+    pending = b""
+    for chunk in iter(lambda: fp.read(CHUNK_SIZE), b""):
+        *rows, pending = (pending + chunk).split(b"</row>")
+        for row in rows:
+            yield row + b"</row>"
+    yield pending
+
+
+def patched_sheet(fp, changed, row_count):
+    """The sheet XML in ``fp`` with the rows in ``changed`` (row number -> story) replaced.
+
+    Rows past ``row_count`` are dropped and changed rows past the old end
+    are appended. Yields blocks of about CHUNK_SIZE bytes.
+    """
+    render = RowRenderer()
+    changed = dict(changed)
+    block = []
+    size = 0
+    for piece in _pieces(fp):
+        match = _ROW.search(piece)
+        if match is None:  # </sheetData> and everything after it
+            for row in sorted(changed):
+                block.append(render(row, changed.pop(row)))
+            block.append(piece)
+            break
+        row = int(match.group(1))
+        block.append(piece[:match.start()])
+        if row <= row_count:
+            story = changed.pop(row, None)
+            block.append(piece[match.start():] if story is None else render(row, story))
+        size += len(piece)
+        if size >= CHUNK_SIZE:
+            yield b"".join(block)
+            block = []
+            size = 0
+    yield b"".join(block)
+
+
+def _patch(output_path, changed, old_count, hashes, compression, parallel):
+    sheet = sheet_part(1)
+    compress_type, level = zip_settings(compression)
+    tmp = atomic.temp_path(output_path)
+    try:
+        with span("rows"), zipfile.ZipFile(output_path) as src, open_zip(tmp, compression) as out:
+            for info in src.infolist():
+                if info.filename != sheet:
+                    out.writestr(info.filename, src.read(info))
+                    continue
+                with src.open(info) as fp:
+                    blocks = patched_sheet(fp, changed, len(hashes) + 1)
+                    if parallel and compress_type == zipfile.ZIP_DEFLATED:
+                        workers = os.cpu_count() or 1
+                        with ThreadPoolExecutor(max_workers=workers) as pool:
+                            write_parallel(out, sheet, blocks, info.file_size, level, pool, 2 * workers)
+                    else:
+                        with out.open(sheet, "w", force_zip64=True) as dest:
+                            for block in blocks:
+                                dest.write(block)
+        with span("save"):
+            atomic.replace(tmp, output_path)
+    except BaseException:
+        atomic.discard(tmp)
+        raise
+    write_manifest(output_path, hashes)
+    return PATCHED, len(hashes)
+
+
+def write_workbook_incremental(open_stories, output_path, compression=DEFAULT, parallel=False):
+    """Bring ``output_path`` up to date with the catalogue.
+
+    ``open_stories`` is called with no arguments and must return a fresh
+    story iterator each time; it is called a second time only when the
+    workbook has to be rebuilt. Returns ``(status, story_count)`` where
+    status is one of UNCHANGED, PATCHED or REBUILT. ``compression`` and
+    ``parallel`` apply whenever the workbook is saved.
+    """
+    manifest = read_manifest(output_path)
+    if manifest is None:
+        return _rebuild(open_stories, output_path, compression, parallel)
+
+    old = manifest["stories"]
+    limit = max(1, int(len(old) * PATCH_FRACTION))
+    hashes = []
+    changed = []
+    with span("hash"):
+        for index, story in enumerate(open_stories()):
+            digest = story_hash(story)
+            hashes.append(digest)
+            if index >= len(old) or old[index] != digest:
+                changed.append((index + 2, story))
+                if len(changed) > limit:
+                    changed = None
+                    break
+
+    if changed is None:
+        return _rebuild(open_stories, output_path, compression, parallel)
+    if not changed and len(hashes) == len(old):
+        return UNCHANGED, len(hashes)
+    return _patch(output_path, changed, len(old), hashes, compression, parallel)
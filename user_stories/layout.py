@@ -0,0 +1,139 @@
+"""Content-aware row heights and column widths, fitted in the writers' single pass.
+
+Widths are in Excel character units (the width of "0" in the default 11pt
+Calibri). ``text_width`` estimates a string's width from a per-character
+table and ``wrapped_lines`` word-wraps one line at a given width. Both are memoised,
+since IDs, roles and many criteria lines repeat across a backlog.
+
+Wrapped columns (story and criteria) are measured at their maximum width.
+A column finishes at that width if anything wraps in it, or narrower when
+every line fits. Either way, no line that was counted as one line wraps in
+the final layout. So the row heights worked out while streaming stay
+correct, and the widths can be written once the last row is in. No second
+pass over the stories is needed.
+"""
+
+import math
+import unicodedata
+from functools import lru_cache
+
+from .rows import HEADER_HEIGHT, HEADERS
+
+# maximum widths; B and D wrap at these, A and C are cut off beyond them
+MAX_COLUMN_WIDTHS = {"A": 15, "B": 60, "C": 15, "D": 80}
+WRAPPED_COLUMNS = frozenset({1, 3})
+CELL_PADDING = 1.5      # characters lost to cell margins
+LINE_HEIGHT = 15        # points per line of 11pt Calibri
+ROW_PADDING = 5
+MIN_ROW_HEIGHT = 20
+BOLD_FACTOR = 1.08      # header font
+
+# Calibri 11pt advance widths relative to the digit width
+_NARROW = dict.fromkeys("ijl.,:;'|!", 0.45)
+_SEMI = dict.fromkeys("frtI()[]{}-/\"", 0.6)
+_WIDE = dict.fromkeys("mw", 1.45)
+_CAPS = dict.fromkeys("ABCDEFGHJKLNOPQRSTUVXYZ", 1.1)
+_WIDE_CAPS = dict.fromkeys("MW", 1.5)
+CHAR_WIDTHS = {" ": 0.45, "\t": 1.8, **_NARROW, **_SEMI, **_WIDE, **_CAPS, **_WIDE_CAPS}
+DEFAULT_CHAR_WIDTH = 0.9  # remaining lower case letters, digits and symbols
+WIDE_CHAR_WIDTH = 1.8     # CJK and other East Asian wide characters
+
+
+def _char_width(char):
+    width = CHAR_WIDTHS.get(char)
+    if width is not None:
+        return width
+    if ord(char) >= 0x1100 and unicodedata.east_asian_width(char) in ("W", "F"):
+        return WIDE_CHAR_WIDTH
+    return DEFAULT_CHAR_WIDTH
+
+
+# ASCII text is measured by translating every character to its width in
+# twentieths and summing the bytes, which keeps the per-character work in C.
+_UNIT = 0.05
+_ASCII_UNITS = bytes(round(_char_width(chr(code)) / _UNIT) if code < 128 else 0 for code in range(256))
+
+
+@lru_cache(maxsize=1 << 16)
+def text_width(text):
+    """Estimated width of a single line of ``text``."""
+    if text.isascii():
+        return sum(text.encode("ascii").translate(_ASCII_UNITS)) * _UNIT
+    return sum(_char_width(char) for char in text)
+
+
+@lru_cache(maxsize=1 << 16)
+def wrapped_lines(line, width):
+    """Lines a single line of text takes in a wrapped cell ``width`` characters wide."""
+    if text_width(line) <= width:
+        return 1
+    lines = 1
+    used = 0.0
+    space = CHAR_WIDTHS[" "]
+    for word in line.split(" "):
+        size = text_width(word)
+        if used and used + space + size > width:
+            lines += 1
+            used = 0.0
+        elif used:
+            used += space
+        # words longer than the cell are broken at the edge
+        while size > width:
+            lines += 1
+            size -= width
+        used += size
+    return lines
+
+
+def line_count(text, width):
+    """Lines ``text`` (which may hold newlines) takes in a wrapped cell."""
+    return sum(wrapped_lines(line, width) for line in text.split("\n"))
+
+
+def _height(lines):
+    return max(MIN_ROW_HEIGHT, lines * LINE_HEIGHT + ROW_PADDING)
+
+
+class AutoFit:
+    """Tracks column widths and sizes rows as they stream past.
+
+    Call ``row_height(values)`` for every row in order and read
+    ``column_widths()`` once the last one is written.
+    """
+
+    def __init__(self, headers=HEADERS, max_widths=MAX_COLUMN_WIDTHS, wrapped=WRAPPED_COLUMNS):
+        self.letters = list(max_widths)
+        self.max_widths = [max_widths[letter] for letter in self.letters]
+        self.wrap_widths = [limit - CELL_PADDING if col in wrapped else None
+                            for col, limit in enumerate(self.max_widths)]
+        self.widths = [text_width(header) * BOLD_FACTOR for header in headers]
+        self.header_height = max(HEADER_HEIGHT, _height(
+            max(line_count(header, limit - CELL_PADDING) for header, limit in zip(headers, self.max_widths))))
+
+    def row_height(self, values):
+        widths = self.widths
+        most = 1
+        for col, value in enumerate(values):
+            text = "" if value is None else str(value)
+            if "\n" in text:
+                lines = text.split("\n")
+                widest = max(map(text_width, lines))
+            else:
+                lines = None
+                widest = text_width(text)
+            if widest > widths[col]:
+                widths[col] = widest
+            limit = self.wrap_widths[col]
+            if limit is not None:
+                if lines is None:
+                    count = wrapped_lines(text, limit)
+                else:
+                    count = sum(wrapped_lines(line, limit) for line in lines)
+                if count > most:
+                    most = count
+        return _height(most)
+
+    def column_widths(self):
+        # rounded up, so nothing measured as fitting wraps after all
+        return {letter: min(limit, math.ceil((width + CELL_PADDING) * 10) / 10)
+                for letter, limit, width in zip(self.letters, self.max_widths, self.widths)}
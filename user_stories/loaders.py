@@ -0,0 +1,278 @@
+"""Load user stories from a JSON, JSONL or SQLite catalogue, or an old generator script.
+
+Every loader is a generator that hands out one story dict at a time, so a
+catalogue is never materialised as a whole. Small catalogues are cached in
+memory keyed on the file's mtime and size, and re-validated with a content
+hash when only the mtime moved (e.g. the file was touched or re-saved
+without changes).
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import sys
+from pathlib import Path
+
+DEFAULT_CATALOGUE = Path(__file__).parent / "data" / "stories.json"
+
+CHUNK_SIZE = 1 << 16
+CACHE_LIMIT = 10_000  # catalogues with more stories are streamed every time
+
+_SEPARATORS = re.compile(r"[\s,]*")
+
+
+def file_hash(path):
+    """sha256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fp:
+        for chunk in iter(lambda: fp.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_json(path):
+    """Yield the objects of a top-level JSON array without reading it whole."""
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as fp:
+        buf, pos = fp.read(CHUNK_SIZE), 0
+        started = False
+        while True:
+            pos = _SEPARATORS.match(buf, pos).end()
+            if pos == len(buf):
+                buf, pos = fp.read(CHUNK_SIZE), 0
+                if not buf:
+                    break
+                continue
+            if not started:
+                if buf[pos] != "[":
+                    raise ValueError(f"{path}: expected a JSON array of stories")
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                story, pos = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # the next story is split across chunks
+                chunk = fp.read(CHUNK_SIZE)
+                if not chunk:
+                    raise
+                buf, pos = buf[pos:] + chunk, 0
+                continue
+            yield story
+    raise ValueError(f"{path}: unterminated JSON array")
+
+
+def iter_jsonl(path):
+    """Yield one story per non-blank line."""
+    with open(path, encoding="utf-8") as fp:
+        for line in fp:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_sqlite(path):
+    """Yield the rows of the ``stories`` table in insertion order.
+
+    ``criteria`` is stored as a JSON array of strings.
+    """
+    conn = sqlite3.connect(Path(path).resolve().as_uri() + "?mode=ro", uri=True)
+    try:
+        rows = conn.execute("SELECT id, epic, role, story, criteria FROM stories ORDER BY rowid")
+        for ident, epic, role, story, criteria in rows:
+            yield {"id": ident, "epic": epic, "role": role, "story": story,
+                   "criteria": json.loads(criteria)}
+    finally:
+        conn.close()
+
+
+SCRIPT_VARIABLE = "user_stories"
+_COMMENT_LINE = re.compile(r"^\s*#\s*(.*?)\s*$")
+_ROLE_SUFFIX = re.compile(r"\s*\((?:User|Admin)\)$")
+
+
+def iter_script(path):
+    """Yield the ``user_stories = [...]`` list of a generator script.
+
+    Reads the old single-file generator, e.g. the copies under .history/.
+    The script is parsed with ast and never executed. The section comments
+    inside the list become each story's epic, as in the bundled catalogue.
+    """
+    import ast
+
+    source = Path(path).read_text(encoding="utf-8")
+    for node in ast.parse(source, str(path)).body:
+        if (isinstance(node, ast.Assign) and isinstance(node.value, ast.List)
+                and any(isinstance(target, ast.Name) and target.id == SCRIPT_VARIABLE for target in node.targets)):
+            break
+    else:
+        raise ValueError(f"{path}: no {SCRIPT_VARIABLE} = [...] list")
+
+    lines = source.splitlines()
+    epic, line = None, node.lineno
+    for element in node.value.elts:
+        for text in lines[line - 1:element.lineno - 1]:
+            match = _COMMENT_LINE.match(text)
+            if match and match.group(1):
+                epic = _ROLE_SUFFIX.sub("", match.group(1))
+        line = element.end_lineno
+        story = ast.literal_eval(element)
+        if epic is not None and isinstance(story, dict) and "epic" not in story:
+            story = {"id": story.get("id"), "epic": epic, **story}
+        yield story
+
+
+READERS = {
+    ".json": iter_json,
+    ".jsonl": iter_jsonl,
+    ".ndjson": iter_jsonl,
+    ".db": iter_sqlite,
+    ".sqlite": iter_sqlite,
+    ".sqlite3": iter_sqlite,
+    ".py": iter_script,
+}
+
+
+def reader_for(path):
+    try:
+        return READERS[Path(path).suffix.lower()]
+    except KeyError:
+        raise ValueError(f"{path}: unsupported catalogue format, "
+                         f"expected one of {', '.join(sorted(READERS))}") from None
+
+
+class _CacheEntry:
+    __slots__ = ("mtime_ns", "size", "digest", "stories")
+
+    def __init__(self, mtime_ns, size, digest=None, stories=None):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.digest = digest
+        self.stories = stories
+
+
+_cache = {}
+
+
+def _fresh_entry(path):
+    """The cache entry for ``path``, replaced with an empty one if the file changed."""
+    stat = path.stat()
+    entry = _cache.get(path)
+    if entry is None:
+        entry = _cache[path] = _CacheEntry(stat.st_mtime_ns, stat.st_size)
+        return entry
+    if (entry.mtime_ns, entry.size) == (stat.st_mtime_ns, stat.st_size):
+        return entry
+    if entry.size == stat.st_size and entry.digest is not None and file_hash(path) == entry.digest:
+        entry.mtime_ns = stat.st_mtime_ns
+        return entry
+    entry = _cache[path] = _CacheEntry(stat.st_mtime_ns, stat.st_size)
+    return entry
+
+
+def catalogue_hash(source=DEFAULT_CATALOGUE):
+    """Content hash of a catalogue file, recomputed only when it changes."""
+    path = Path(source).resolve()
+    entry = _fresh_entry(path)
+    if entry.digest is None:
+        entry.digest = file_hash(path)
+    return entry.digest
+
+
+def _copy(story):
+    # malformed entries are passed through untouched for validation to report
+    if not isinstance(story, dict) or not isinstance(story.get("criteria"), list):
+        return story
+    return {**story, "criteria": list(story["criteria"])}
+
+
+def load_stories(source=DEFAULT_CATALOGUE):
+    """Yield the stories in ``source`` one at a time.
+
+    The format is picked from the file suffix. Callers get their own copy of
+    each story, so mutating it does not affect the cache.
+    """
+    path = Path(source).resolve()
+    read = reader_for(path)
+    entry = _fresh_entry(path)
+    if entry.stories is not None:
+        for story in entry.stories:
+            yield _copy(story)
+        return
+
+    kept = []
+    for story in read(path):
+        if kept is not None:
+            kept.append(story)
+            if len(kept) > CACHE_LIMIT:
+                kept = None
+            else:
+                story = _copy(story)
+        yield story
+
+    # only a fully consumed, small catalogue is cached
+    if kept is not None and _cache.get(path) is entry:
+        if entry.digest is None:
+            entry.digest = file_hash(path)
+        entry.stories = tuple(kept)
+
+
+def load_objects(source=DEFAULT_CATALOGUE):
+    """``load_stories`` without the entries that are not objects.
+
+    For commands that only read fields: a list or string in the catalogue
+    is reported on stderr and skipped. ``validate`` lists it as a problem.
+    """
+    for position, story in enumerate(load_stories(source), 1):
+        if isinstance(story, dict):
+            yield story
+        else:
+            print(f"{source}: skipping story #{position}: expected an object, got {type(story).__name__}",
+                  file=sys.stderr)
+
+
+def clear_cache():
+    _cache.clear()
+
+
+def dump_stories(stories, destination):
+    """Stream ``stories`` into a JSON, JSONL or SQLite catalogue.
+
+    Returns the number of stories written.
+    """
+    path = Path(destination)
+    read = reader_for(path)
+    if read is iter_script:
+        raise ValueError(f"{path}: generator scripts can be read but not written")
+    count = 0
+    if read is iter_sqlite:
+        conn = sqlite3.connect(path)
+        try:
+            with conn:
+                conn.execute("DROP TABLE IF EXISTS stories")
+                conn.execute("CREATE TABLE stories (id TEXT NOT NULL, epic TEXT, "
+                             "role TEXT NOT NULL, story TEXT NOT NULL, criteria TEXT NOT NULL)")
+                for story in stories:
+                    conn.execute("INSERT INTO stories VALUES (?, ?, ?, ?, ?)",
+                                 (story["id"], story.get("epic"), story["role"], story["story"],
+                                  json.dumps(story["criteria"], ensure_ascii=False)))
+                    count += 1
+        finally:
+            conn.close()
+        return count
+
+    with open(path, "w", encoding="utf-8") as fp:
+        if read is iter_jsonl:
+            for story in stories:
+                fp.write(json.dumps(story, ensure_ascii=False) + "\n")
+                count += 1
+            return count
+        fp.write("[")
+        for story in stories:
+            fp.write(",\n" if count else "\n")
+            fp.write("    " + json.dumps(story, indent=4, ensure_ascii=False).replace("\n", "\n    "))
+            count += 1
+        fp.write("\n]\n" if count else "]\n")
+    return count
@@ -0,0 +1,12 @@
+"""Colours of the workbook looks, shared by the openpyxl styles and the raw
+SpreadsheetML writer."""
+
+HEADER_COLOR = "1F4E78"
+HEADER_FONT_COLOR = "FFFFFF"
+USER_COLOR = "D9E8F5"
+ADMIN_COLOR = "FFE699"
+CRITERIA_COLOR = "E2EFDA"
+ADDED_COLOR = "C6EFCE"
+REMOVED_COLOR = "FFC7CE"
+MODIFIED_COLOR = "FFEB9C"
+FONT_SIZE = 11
@@ -0,0 +1,113 @@
+"""Named timing spans and optional cProfile capture for a generator run.
+
+Library code marks its phases with ``span("save")`` blocks and times hot
+per-row helpers with ``measure("row_height", func, *args)``. Both cost a
+single global lookup while no Profiler is running. Spans nest, so "rows"
+includes the time recorded under "row_height".
+"""
+
+import cProfile
+import io
+import json
+import platform
+import pstats
+import time
+from contextlib import contextmanager, nullcontext
+
+REPORT_VERSION = 1
+TOP_FUNCTIONS = 25
+
+_active = None
+_NULL = nullcontext()
+
+
+class Profiler:
+    def __init__(self):
+        self.spans = {}
+        self.started = None
+        self.stopped = None
+        self.cprofile = None
+
+    def start(self, cprofile=False):
+        global _active
+        _active = self
+        if cprofile:
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+        self.started = time.perf_counter()
+        return self
+
+    def stop(self):
+        global _active
+        self.stopped = time.perf_counter()
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        if _active is self:
+            _active = None
+
+    def add(self, name, seconds, calls=1):
+        entry = self.spans.get(name)
+        if entry is None:
+            self.spans[name] = [seconds, calls]
+        else:
+            entry[0] += seconds
+            entry[1] += calls
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def top_functions(self, limit=TOP_FUNCTIONS):
+        """The cProfile entries with the highest cumulative time."""
+        if self.cprofile is None:
+            return []
+        stats = pstats.Stats(self.cprofile, stream=io.StringIO())
+        rows = []
+        for (filename, line, func), (_, calls, total, cumulative, _) in stats.stats.items():
+            rows.append({"function": f"{filename}:{line}({func})", "calls": calls,
+                         "total_seconds": total, "cumulative_seconds": cumulative})
+        rows.sort(key=lambda row: row["cumulative_seconds"], reverse=True)
+        return rows[:limit]
+
+    def report(self, **extra):
+        end = self.stopped if self.stopped is not None else time.perf_counter()
+        return {
+            "version": REPORT_VERSION,
+            "python": platform.python_version(),
+            "wall_seconds": end - self.started,
+            "phases": {name: {"seconds": seconds, "calls": calls}
+                       for name, (seconds, calls) in self.spans.items()},
+            **extra,
+            "top_functions": self.top_functions(),
+        }
+
+    def write(self, path, **extra):
+        with open(path, "w", encoding="utf-8") as fp:
+            json.dump(self.report(**extra), fp, indent=2)
+
+    def dump_stats(self, path):
+        """Save the raw cProfile data for pstats/snakeviz."""
+        if self.cprofile is not None:
+            self.cprofile.dump_stats(path)
+
+
+def span(name):
+    """Time a block under ``name`` when a Profiler is running."""
+    if _active is None:
+        return _NULL
+    return _active.span(name)
+
+
+def measure(name, func, *args):
+    """``func(*args)``, timed under ``name`` when a Profiler is running."""
+    if _active is None:
+        return func(*args)
+    start = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        _active.add(name, time.perf_counter() - start)
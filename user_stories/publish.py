@@ -0,0 +1,152 @@
+"""Render the catalogue once and write it to every destination at the same time.
+
+    python -m user_stories publish //share/qa/stories.xlsx build/artifacts/stories.xlsx \\
+        "build/artifacts/billing.csv?epic=BILLING" "teams/admin.xlsx?role=Admin"
+
+A destination is a path, optionally followed by the filters of the render
+service (see service.py) as a query string. The format comes from the
+suffix, or from a ``format`` filter for paths without one
+(``out/stories?format=csv``). Destinations can also be listed in a JSON
+config file:
+
+    [{"path": "teams/billing.xlsx", "epic": "BILLING"}, {"path": "build/artifacts/stories.xlsx"}]
+
+Each distinct (format, filters) is rendered once, in memory, so the
+shared-drive copy and the artifacts copy of the same workbook cost one
+render. Renders run one after another on a worker thread. As soon as a
+body is ready its writes are handed to a thread pool, so they overlap the
+next render and each other, and the run takes about as long as the
+renders plus the slowest write.
+
+Every write goes to a temporary file next to the destination, which is
+flushed, fsynced and then renamed over it (see atomic.py). A reader never sees a
+half-written file, and a failed write leaves the previous file in place.
+A failing destination does not stop the others; its error is reported in
+the results.
+"""
+
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import parse_qs
+
+from .atomic import file_mode, write_atomic
+from .service import SpecError, filter_stories, normalise_spec, render
+
+IO_WORKERS = 16
+
+
+class Destination:
+    """Where to write, in which format and for which stories."""
+
+    __slots__ = ("path", "fmt", "filters")
+
+    def __init__(self, path, spec=None):
+        self.path = str(path)
+        spec = dict(spec or {})
+        fmt = spec.pop("format", None) or Path(self.path).suffix.lower().lstrip(".")
+        if not fmt:
+            raise ValueError(f"{self.path}: no file suffix to take the format from; add one or give format=")
+        try:
+            self.fmt, self.filters = normalise_spec(dict(spec, format=fmt))
+        except SpecError as error:
+            raise ValueError(f"{self.path}: {error}") from None
+
+    @classmethod
+    def parse(cls, text):
+        """``path`` or ``path?role=Admin&epic=BILLING``."""
+        path, _, query = text.partition("?")
+        return cls(path, {name: values if len(values) > 1 else values[0]
+                          for name, values in parse_qs(query).items()})
+
+    @property
+    def key(self):
+        return self.fmt, self.filters
+
+
+def load_destinations(path):
+    """Destinations from a JSON list of ``{"path": ..., <filter>: ...}`` objects."""
+    with open(path, encoding="utf-8") as fp:
+        entries = json.load(fp)
+    if not isinstance(entries, list):
+        raise ValueError(f"{path}: expected a JSON list of destinations")
+    destinations = []
+    for entry in entries:
+        spec = dict(entry)
+        try:
+            target = spec.pop("path")
+        except KeyError:
+            raise ValueError(f"{path}: destination without a path: {entry!r}") from None
+        destinations.append(Destination(target, spec))
+    return destinations
+
+
+class Written:
+    """The outcome of one destination: bytes written and time taken, or the error."""
+
+    __slots__ = ("path", "size", "seconds", "error")
+
+    def __init__(self, path, size=0, seconds=0.0, error=None):
+        self.path = path
+        self.size = size
+        self.seconds = seconds
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def _timed_write(path, body, mode):
+    start = time.perf_counter()
+    size = write_atomic(path, body, mode)
+    return Written(path, size, time.perf_counter() - start)
+
+
+async def _publish(stories, destinations, io_workers, mode):
+    loop = asyncio.get_running_loop()
+    groups = {}
+    for destination in destinations:
+        groups.setdefault(destination.key, []).append(destination)
+
+    writes = []
+    with ThreadPoolExecutor(max_workers=1) as renderer, ThreadPoolExecutor(max_workers=io_workers) as io:
+        for (fmt, filters), group in groups.items():
+            try:
+                body = await loop.run_in_executor(renderer, render, filter_stories(stories, filters), fmt)
+            except Exception as error:
+                writes.extend(_failed(destination.path, error) for destination in group)
+                continue
+            writes.extend(loop.run_in_executor(io, _timed_write, destination.path, body, mode)
+                          for destination in group)
+        results = await asyncio.gather(*writes, return_exceptions=True)
+    return [result if isinstance(result, Written) else Written(destination.path, error=result)
+            for destination, result in zip(_in_group_order(groups), results)]
+
+
+async def _failed(path, error):
+    return Written(path, error=error)
+
+
+def _in_group_order(groups):
+    for group in groups.values():
+        yield from group
+
+
+def publish(stories, destinations, io_workers=None):
+    """Render ``stories`` once per distinct format and filter set and write every destination.
+
+    ``stories`` must be a list, since it is filtered once per render.
+    Returns a ``Written`` per destination, in the order given.
+    """
+    paths = [os.path.abspath(destination.path) for destination in destinations]
+    if len(set(paths)) != len(paths):
+        raise ValueError("the same path is listed more than once")
+    io_workers = io_workers or min(IO_WORKERS, len(destinations)) or 1
+    # the umask is process-wide, so it is read here rather than on the writer threads
+    results = asyncio.run(_publish(stories, destinations, io_workers, file_mode()))
+    order = {destination.path: n for n, destination in enumerate(destinations)}
+    return sorted(results, key=lambda written: order[written.path])
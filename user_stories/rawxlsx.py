@@ -0,0 +1,235 @@
+"""Direct SpreadsheetML backend for very large backlogs.
+
+Writes ``xl/worksheets/sheet1.xml`` straight into the zip stream as rows
+arrive, next to a fixed ``styles.xml`` holding the header, ID, user, admin
+and criteria looks and a small ``sharedStrings.xml``. No openpyxl objects
+are created. Only the header and role values go through the shared-string
+table, since they are the only values that repeat. Everything else is
+written as an inline string, so memory stays flat however many rows there
+are. With ``autofit`` the rows are spooled to a temporary file until the
+column widths are known (see layout.py), then copied in behind them.
+``compression`` and ``parallel`` are as in compression.py; with
+``parallel`` the sheet is spooled too and deflated on a thread pool at
+close.
+
+The package is written to a temporary file next to the output and renamed
+over it on close, so a failed export leaves the previous workbook intact.
+
+The output opens in Excel and reads back through openpyxl with the same
+values, fills, fonts, borders, alignment, row heights and column widths as
+the openpyxl backends (see benchmarks/bench_rawxlsx.py).
+"""
+
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from xml.sax.saxutils import escape
+
+from . import atomic
+from .compression import DEFAULT, open_zip, write_parallel, zip_settings
+from .layout import AutoFit
+from .palette import ADMIN_COLOR, CRITERIA_COLOR, FONT_SIZE, HEADER_COLOR, HEADER_FONT_COLOR, USER_COLOR
+from .profiling import measure
+from .rows import COLUMN_WIDTHS, HEADER_HEIGHT, SHEET_TITLE, row_height
+from .xlsxzip import SHEET_NS, XML_DECLARATION, sheet_part, write_package
+
+FLUSH_BYTES = 1 << 16
+
+# cellXfs indices in STYLES_XML
+HEADER_XF, ID_XF, USER_STORY_XF, USER_ROLE_XF, ADMIN_STORY_XF, ADMIN_ROLE_XF, CRITERIA_XF = range(1, 8)
+HEADER_XFS = (HEADER_XF,) * 4
+USER_XFS = (ID_XF, USER_STORY_XF, USER_ROLE_XF, CRITERIA_XF)
+ADMIN_XFS = (ID_XF, ADMIN_STORY_XF, ADMIN_ROLE_XF, CRITERIA_XF)
+# value columns that go through the shared-string table
+SHARED_COLUMNS = frozenset({2})
+
+_ILLEGAL_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _fill(color):
+    return (f'<fill><patternFill patternType="solid"><fgColor rgb="00{color}"/>'
+            f'<bgColor rgb="00{color}"/></patternFill></fill>')
+
+
+def _xf(font, fill, horizontal, vertical, wrap):
+    wrap = ' wrapText="1"' if wrap else ""
+    return (f'<xf numFmtId="0" fontId="{font}" fillId="{fill}" borderId="1" xfId="0" '
+            f'applyFont="1" applyFill="1" applyBorder="1" applyAlignment="1">'
+            f'<alignment horizontal="{horizontal}" vertical="{vertical}"{wrap}/></xf>')
+
+
+_THIN = '<{0} style="thin"/>'
+
+STYLES_XML = (
+    f'{XML_DECLARATION}<styleSheet xmlns="{SHEET_NS}">'
+    '<fonts count="2">'
+    f'<font><sz val="{FONT_SIZE}"/><name val="Calibri"/><family val="2"/></font>'
+    f'<font><b val="1"/><sz val="{FONT_SIZE}"/><color rgb="00{HEADER_FONT_COLOR}"/></font>'
+    '</fonts>'
+    '<fills count="6">'
+    '<fill><patternFill/></fill><fill><patternFill patternType="gray125"/></fill>'
+    f'{_fill(HEADER_COLOR)}{_fill(USER_COLOR)}{_fill(ADMIN_COLOR)}{_fill(CRITERIA_COLOR)}'
+    '</fills>'
+    '<borders count="2">'
+    '<border><left/><right/><top/><bottom/><diagonal/></border>'
+    f'<border>{"".join(_THIN.format(side) for side in ("left", "right", "top", "bottom"))}</border>'
+    '</borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="8">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    f'{_xf(1, 2, "center", "center", True)}'   # header
+    f'{_xf(0, 0, "center", "top", False)}'     # id
+    f'{_xf(0, 3, "left", "top", True)}'        # user story
+    f'{_xf(0, 3, "center", "top", False)}'     # user role
+    f'{_xf(0, 4, "left", "top", True)}'        # admin story
+    f'{_xf(0, 4, "center", "top", False)}'     # admin role
+    f'{_xf(0, 5, "left", "top", True)}'        # criteria
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+_COLUMNS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def _text(value):
+    if _ILLEGAL_XML.search(value):
+        raise ValueError(f"{value[:40]!r}... contains characters that cannot be stored in XLSX")
+    return escape(value)
+
+
+def _column_index(letter):
+    return _COLUMNS.index(letter) + 1
+
+
+def _sheet_head(widths):
+    cols = "".join(f'<col min="{_column_index(letter)}" max="{_column_index(letter)}" '
+                   f'width="{width}" customWidth="1"/>' for letter, width in widths.items())
+    return (f'{XML_DECLARATION}<worksheet xmlns="{SHEET_NS}">'
+            f'<sheetFormatPr defaultRowHeight="15"/><cols>{cols}</cols><sheetData>')
+
+
+_SHEET_TAIL = "</sheetData></worksheet>"
+
+
+class RawXlsxWriter:
+    """Writer backend (see writers.py) that emits SpreadsheetML directly."""
+
+    def __init__(self, output_path, compression=DEFAULT, autofit=False, parallel=False):
+        self.output_path = output_path
+        self.tmp = atomic.temp_path(output_path)
+        self.zf = open_zip(self.tmp, compression)
+        compress_type, self.level = zip_settings(compression)
+        self.parallel = parallel and compress_type == zipfile.ZIP_DEFLATED
+        self.fit = AutoFit() if autofit else None
+        self.shared = {}
+        self.shared_refs = 0
+        self.row = 0
+        self.buffer = []
+        self.buffered = 0
+        if self.fit is None and not self.parallel:
+            # force_zip64: the size is unknown up front and may pass 2 GiB
+            self.sheet = self.zf.open(sheet_part(1), "w", force_zip64=True)
+            self._write(_sheet_head(COLUMN_WIDTHS))
+        else:
+            # <cols> precedes the rows, so they wait in a spool until the widths are known
+            self.sheet = tempfile.TemporaryFile()
+
+    def _write(self, text):
+        self.buffer.append(text)
+        self.buffered += len(text)
+        if self.buffered >= FLUSH_BYTES:
+            self._flush()
+
+    def _flush(self):
+        self.sheet.write("".join(self.buffer).encode("utf-8"))
+        self.buffer = []
+        self.buffered = 0
+
+    def _shared_index(self, value):
+        index = self.shared.get(value)
+        if index is None:
+            index = self.shared[value] = len(self.shared)
+        return index
+
+    def _append(self, values, xfs, height):
+        self.row += 1
+        row = self.row
+        cells = [f'<row r="{row}" ht="{height}" customHeight="1">']
+        for col, (value, xf) in enumerate(zip(values, xfs)):
+            ref = f"{_COLUMNS[col]}{row}"
+            if value is None:
+                cells.append(f'<c r="{ref}" s="{xf}"/>')
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                cells.append(f'<c r="{ref}" s="{xf}"><v>{value}</v></c>')
+            elif col in SHARED_COLUMNS or row == 1:
+                self.shared_refs += 1
+                cells.append(f'<c r="{ref}" s="{xf}" t="s"><v>{self._shared_index(str(value))}</v></c>')
+            else:
+                cells.append(f'<c r="{ref}" s="{xf}" t="inlineStr"><is><t xml:space="preserve">'
+                             f'{_text(str(value))}</t></is></c>')
+        cells.append("</row>")
+        self._write("".join(cells))
+
+    def write_header(self, headers):
+        self._append(headers, HEADER_XFS, HEADER_HEIGHT if self.fit is None else self.fit.header_height)
+
+    def write_row(self, values, story):
+        xfs = ADMIN_XFS if story["role"] == "Admin" else USER_XFS
+        if self.fit is None:
+            height = measure("row_height", row_height, story)
+        else:
+            height = measure("row_height", self.fit.row_height, values)
+        self._append(values, xfs, height)
+
+    def _shared_strings_xml(self):
+        items = "".join(f'<si><t xml:space="preserve">{_text(value)}</t></si>' for value in self.shared)
+        return (f'{XML_DECLARATION}<sst xmlns="{SHEET_NS}" count="{self.shared_refs}" '
+                f'uniqueCount="{len(self.shared)}">{items}</sst>')
+
+    def close(self):
+        try:
+            self._finish()
+        except BaseException:
+            self.discard()
+            raise
+        atomic.replace(self.tmp, self.output_path)
+
+    def discard(self):
+        """Drop the partly written package; the output path is left as it was."""
+        for close in (self.sheet.close, self.zf.close):
+            try:
+                close()
+            except Exception:
+                pass
+        atomic.discard(self.tmp)
+
+    def _finish(self):
+        if self.fit is None and not self.parallel:
+            self._write(_SHEET_TAIL)
+            self._flush()
+            self.sheet.close()
+        else:
+            self._flush()
+            spool = self.sheet
+            size = spool.tell()
+            spool.seek(0)
+            head = _sheet_head(COLUMN_WIDTHS if self.fit is None else self.fit.column_widths()).encode("utf-8")
+            tail = _SHEET_TAIL.encode("utf-8")
+            if self.parallel:
+                workers = os.cpu_count() or 1
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    write_parallel(self.zf, sheet_part(1), [head, spool, tail], len(head) + size + len(tail),
+                                   self.level, pool, 2 * workers)
+            else:
+                with self.zf.open(sheet_part(1), "w", force_zip64=True) as sheet:
+                    sheet.write(head)
+                    shutil.copyfileobj(spool, sheet, 1 << 20)
+                    sheet.write(tail)
+            spool.close()
+        write_package(self.zf, [SHEET_TITLE], STYLES_XML, shared_strings=True)
+        self.zf.writestr("xl/sharedStrings.xml", self._shared_strings_xml())
+        self.zf.close()
@@ -0,0 +1,80 @@
+"""Compact story records for holding large catalogues in memory.
+
+A story dict costs a hash table plus a list for its criteria, and every
+loaded story carries its own copy of "User", the epic name and recurring
+criteria lines. ``Story`` keeps the same fields in ``__slots__``, stores the
+criteria as a tuple and interns the role, epic and criteria strings, so
+repeated values are shared between records.
+
+Records read like the dicts they replace (``story["role"]``,
+``story.get("epic")``), so the row builders and writers accept either.
+Keys outside the five fields are kept in ``extra``.
+
+    python -m benchmarks.bench_records   # memory per story, dicts vs records
+"""
+
+from sys import intern
+
+FIELDS = ("id", "epic", "role", "story", "criteria")
+
+
+def _intern(value):
+    return intern(value) if type(value) is str else value
+
+
+class Story:
+    __slots__ = FIELDS + ("extra",)
+
+    def __init__(self, id, epic, role, story, criteria, extra=None):
+        self.id = id
+        self.epic = _intern(epic)
+        self.role = _intern(role)
+        self.story = story
+        self.criteria = tuple(_intern(line) for line in criteria)
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data):
+        """A record from a catalogue dict; unknown keys go to ``extra``."""
+        extra = {key: value for key, value in data.items() if key not in FIELDS}
+        return cls(data.get("id"), data.get("epic"), data.get("role"), data.get("story"),
+                   data.get("criteria") or (), extra)
+
+    def as_dict(self):
+        """The catalogue dict form, as load_stories yields it."""
+        data = {"id": self.id, "epic": self.epic, "role": self.role, "story": self.story,
+                "criteria": list(self.criteria)}
+        if self.epic is None:
+            del data["epic"]
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __getitem__(self, key):
+        if key in FIELDS:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __eq__(self, other):
+        if not isinstance(other, Story):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Story({self.id!r}, role={self.role!r}, {len(self.criteria)} criteria)"
+
+
+def compact(stories):
+    """Yield a Story record for every story dict in ``stories``."""
+    for story in stories:
+        yield story if isinstance(story, Story) else Story.from_dict(story)
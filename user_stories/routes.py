@@ -0,0 +1,231 @@
+"""Draft user stories extracted from the Express routers.
+
+Scans ``server/src/routers/*.js`` for ``router.get/post/put/patch/delete(...)``
+calls, notes whether ``verifyJWT`` guards them and which controller the
+handler is imported from, and resolves the mount prefix from ``app.js``.
+Parsed results are kept in a FileCache, so re-running on an unchanged tree
+only stats the files.
+
+    python -m user_stories.routes [SERVER_SRC] [-o drafts.jsonl]
+"""
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+
+from .filecache import FileCache
+
+SERVER_SRC = Path(__file__).resolve().parents[1] / "server" / "src"
+METHODS = ("get", "post", "put", "patch", "delete")
+AUTH_MIDDLEWARE = "verifyJWT"
+# Bump when the parser output changes.
+PARSER_VERSION = 1
+
+_STRINGS_AND_COMMENTS = re.compile(
+    r"""("(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`)|(//[^\n]*|/\*.*?\*/)""",
+    re.S,
+)
+_ROUTER_VAR = re.compile(r"\b(?:const|let|var)\s+(\w+)\s*=\s*(?:express\s*\.\s*)?Router\s*\(")
+_NAMED_IMPORT = re.compile(r"""\bimport\s*\{([^}]*)\}\s*from\s*["']([^"']+)["']""")
+_DEFAULT_IMPORT = re.compile(r"""\bimport\s+(\w+)\s+from\s*["']([^"']+)["']""")
+_MOUNT = re.compile(r"""\bapp\s*\.\s*use\s*\(\s*(["'])(.*?)\1\s*,\s*(\w+)\s*\)""")
+_IDENTIFIER = re.compile(r"[\w$.]+$")
+_CAMEL = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+")
+_OPEN, _CLOSE = "([{", ")]}"
+
+
+def strip_comments(source):
+    """Blank out JS comments, keeping strings and line numbers intact."""
+    def replace(match):
+        if match.group(1):
+            return match.group(1)
+        return "\n" * match.group(2).count("\n")
+    return _STRINGS_AND_COMMENTS.sub(replace, source)
+
+
+def _call_args(source, start):
+    """Split the arguments of the call whose "(" is just before ``start``."""
+    args, depth, quote, begin = [], 0, None, start
+    pos = start - 1
+    while pos + 1 < len(source):
+        pos += 1
+        char = source[pos]
+        if quote:
+            if char == "\\":
+                pos += 1
+            elif char == quote:
+                quote = None
+        elif char in "\"'`":
+            quote = char
+        elif char in _OPEN:
+            depth += 1
+        elif char in _CLOSE:
+            if depth == 0:
+                args.append(source[begin:pos].strip())
+                return [arg for arg in args if arg]
+            depth -= 1
+        elif char == "," and depth == 0:
+            args.append(source[begin:pos].strip())
+            begin = pos + 1
+    return None
+
+
+def _unquote(arg):
+    if len(arg) >= 2 and arg[0] == arg[-1] and arg[0] in "\"'`":
+        return arg[1:-1]
+    return None
+
+
+def parse_router(source):
+    """Routes declared in one router module, in source order."""
+    source = strip_comments(source)
+    names = set(_ROUTER_VAR.findall(source)) or {"router"}
+    controllers = {}
+    for imported, module in _NAMED_IMPORT.findall(source):
+        for name in imported.split(","):
+            name = name.split(" as ")[-1].strip()
+            if name:
+                controllers[name] = module
+
+    pattern = re.compile(r"\b(%s)\s*\.\s*(%s)\s*\(" % (
+        "|".join(map(re.escape, sorted(names))), "|".join(METHODS)))
+    routes = []
+    for match in pattern.finditer(source):
+        args = _call_args(source, match.end())
+        if not args or _unquote(args[0]) is None:
+            continue
+        handler = args[-1] if len(args) > 1 and _IDENTIFIER.match(args[-1]) else "<inline>"
+        middleware = args[1:-1]
+        routes.append({
+            "method": match.group(2).upper(),
+            "path": _unquote(args[0]),
+            "handler": handler,
+            "controller": controllers.get(handler),
+            "middleware": middleware,
+            "auth": AUTH_MIDDLEWARE in middleware,
+            "line": source.count("\n", 0, match.start()) + 1,
+        })
+    return routes
+
+
+def parse_mounts(source):
+    """Map router module paths (as imported by app.js) to their mount prefix."""
+    source = strip_comments(source)
+    modules = {name: module for name, module in _DEFAULT_IMPORT.findall(source)}
+    return {modules[name]: prefix for _, prefix, name in _MOUNT.findall(source) if name in modules}
+
+
+def _relative(path, root):
+    try:
+        return path.relative_to(root).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def resolve_routes(path, routes, mounts, server_src):
+    """Add endpoint, source and a server_src-relative controller to parsed routes."""
+    root = Path(server_src).resolve()
+    path = Path(path).resolve()
+    prefix = mounts.get(path, "")
+    source = _relative(path, root.parent.parent)
+    resolved = []
+    for route in routes:
+        controller = route["controller"]
+        if controller is not None:
+            controller = _relative((path.parent / controller).resolve(), root)
+        resolved.append(dict(
+            route,
+            controller=controller,
+            endpoint=prefix.rstrip("/") + route["path"],
+            source=f"{source}:{route['line']}",
+        ))
+    return resolved
+
+
+def resolve_mounts(mounts, server_src):
+    """parse_mounts output keyed by the router's resolved path."""
+    return {(Path(server_src) / module).resolve(): prefix for module, prefix in mounts.items()}
+
+
+def extract_routes(server_src=SERVER_SRC, cache=None):
+    """Every route under ``server_src/routers`` with its full endpoint path."""
+    server_src = Path(server_src)
+    own_cache = cache is None
+    if own_cache:
+        cache = FileCache("routes", PARSER_VERSION)
+
+    mounts = {}
+    app = server_src / "app.js"
+    if app.exists():
+        mounts = resolve_mounts(cache.get(app, parse_mounts), server_src)
+
+    routes = []
+    for path in sorted((server_src / "routers").glob("*.js")):
+        routes.extend(resolve_routes(path, cache.get(path, parse_router), mounts, server_src))
+    if own_cache:
+        cache.save()
+    return routes
+
+
+def humanise(name):
+    """loginUser -> "login user", ChangeProdutAvailableSatus -> "change produt available satus"."""
+    return " ".join(word.lower() for word in _CAMEL.findall(name)) or name
+
+
+def draft_story(route):
+    """A draft catalogue entry for one route, keyed by "METHOD /endpoint"."""
+    key = f"{route['method']} {route['endpoint']}"
+    handler = route["handler"]
+    admin = "admin" in handler.lower() or "admin" in route["endpoint"].lower()
+    role = "Admin" if admin else "User"
+    inline = handler == "<inline>"
+    action = f"call {route['endpoint']}" if inline else humanise(handler)
+    where = f" in {route['controller']}" if route["controller"] else ""
+    criteria = [
+        "GIVEN I am logged in with a valid JWT" if route["auth"] else "GIVEN I do not need to be logged in",
+        f"WHEN I send {key}",
+        "THEN the inline handler should handle the request" if inline
+        else f"THEN {handler}{where} should handle the request",
+    ]
+    if route["auth"]:
+        criteria.append("AND requests without a valid JWT should be rejected with 401 Unauthorized")
+    epic = Path(route["source"].split(":")[0]).name.split(".")[0].upper() + " ROUTES"
+    return {
+        "id": key,
+        "epic": epic,
+        "role": role,
+        "story": f"As {'an admin' if admin else 'a user'}, I want to {action} so that {key} is covered by a story",
+        "criteria": criteria,
+        "source": route["source"],
+    }
+
+
+def draft_stories(routes):
+    for route in routes:
+        yield draft_story(route)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Emit draft user stories for every Express route.")
+    parser.add_argument("server_src", nargs="?", default=SERVER_SRC, help="the server's src directory")
+    parser.add_argument("-o", "--output", help="JSONL file to write (default: stdout)")
+    args = parser.parse_args(argv)
+
+    cache = FileCache("routes", PARSER_VERSION)
+    routes = extract_routes(args.server_src, cache)
+    cache.save()
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for story in draft_stories(routes):
+            out.write(json.dumps(story, ensure_ascii=False) + "\n")
+    finally:
+        if args.output:
+            out.close()
+    print(f"✓ {len(routes)} routes, {cache.hits} files from cache, {cache.misses} parsed", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
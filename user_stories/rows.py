@@ -0,0 +1,32 @@
+"""Turn stories into the four output columns, plus the sheet layout shared by
+every writer.
+
+Kept free of openpyxl so text backends do not pay for importing it.
+"""
+
+SHEET_TITLE = "User Stories"
+HEADERS = ["ID", "User Story", "Role", "Acceptance Criteria"]
+COLUMN_WIDTHS = {"A": 8, "B": 45, "C": 15, "D": 50}
+HEADER_HEIGHT = 25
+ROLES = ("User", "Admin")
+
+
+def story_text(story):
+    """Rewrite "As a user, I want ..." into the column B wording.
+
+    Raises ValueError naming the story when its text has no "I want"
+    (``validate`` reports those up front).
+    """
+    parts = story["story"].split("I want") if isinstance(story["story"], str) else ()
+    if len(parts) < 2:
+        raise ValueError(f"story {story.get('id', '?')}: story text has no 'I want': {story['story']!r}")
+    return f"As a {story['role'].lower()} I want {parts[1].strip()}"
+
+
+def story_values(story):
+    """The four cell values of a story row."""
+    return [story["id"], story_text(story), story["role"], "\n".join(story["criteria"])]
+
+
+def row_height(story):
+    return max(30, len(story["criteria"]) * 20)
@@ -0,0 +1,184 @@
+"""Full-text search over stories and acceptance criteria.
+
+The index is an SQLite database with an FTS5 table over the story text,
+role, epic and criteria, using the porter stemmer ("paginated" finds
+"pagination"). Results are ranked with FTS5's built-in BM25, weighted so
+a hit in the story text counts more than one in the criteria.
+
+One index is kept per catalogue under the cache directory. ``sync`` brings
+it up to date incrementally:
+
+* if the catalogue's mtime and size match the last sync, nothing is read;
+* if only the mtime moved and the content hash matches, nothing is written;
+* otherwise the catalogue is streamed once and each story's content hash
+  (diff.content_hash) is compared with the stored one. Only new and
+  changed stories are re-indexed and stories that are gone are deleted,
+  all in one transaction.
+
+Stories are keyed by ID and occurrence, so a catalogue that repeats an ID
+(which ``validate`` reports) still indexes every copy.
+
+A query on an up-to-date index is therefore one stat call plus one
+SQLite lookup.
+
+    python -m user_stories search low stock threshold [--limit 10] [--json]
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+from collections import Counter
+from pathlib import Path
+
+from .diff import content_hash
+from .filecache import CACHE_DIR
+from .loaders import file_hash, load_objects
+
+# Bump when the schema or the indexed text changes.
+SEARCH_VERSION = 2
+COLUMNS = ("id", "role", "epic", "story", "criteria")
+# bm25() weights, in COLUMNS order
+WEIGHTS = (8.0, 2.0, 1.0, 4.0, 1.0)
+
+_TERM = re.compile(r'"[^"]*"\*?|[^\s"]+')
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);
+CREATE TABLE IF NOT EXISTS docs (
+    id TEXT NOT NULL, occurrence INTEGER NOT NULL, hash BLOB NOT NULL, PRIMARY KEY (id, occurrence)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS stories_fts USING fts5(
+    {", ".join(COLUMNS)}, tokenize = 'porter unicode61'
+);
+"""
+
+
+def index_path(catalogue):
+    """Default index location for a catalogue: one database per catalogue path."""
+    key = hashlib.sha1(str(Path(catalogue).resolve()).encode("utf-8")).hexdigest()[:16]
+    return CACHE_DIR / f"search-{key}.db"
+
+
+def match_expression(query):
+    """Turn free text into an FTS5 query: every term must match.
+
+    Words are quoted so punctuation such as the hyphen in "US-29" is not
+    read as FTS5 syntax (it becomes the phrase "US 29", which finds the
+    story by ID). "double quoted phrases" stay phrases and a
+    trailing * keeps its prefix meaning.
+    """
+    terms = []
+    for term in _TERM.findall(query):
+        prefix = term.endswith("*")
+        term = term.rstrip("*").strip('"')
+        if term:
+            terms.append('"' + term.replace('"', '""') + '"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+def _highlight(snippet):
+    # snippet() marks matches with \x02/\x03 so brackets in the text are not mistaken for them
+    if "\x02" not in snippet:
+        return None
+    return snippet.replace("\x02", "[").replace("\x03", "]").replace("\n", " / ")
+
+
+class SearchIndex:
+    def __init__(self, catalogue, path=None):
+        self.catalogue = Path(catalogue).resolve()
+        self.path = Path(path) if path else index_path(self.catalogue)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        if self._meta("version") != SEARCH_VERSION:
+            self.conn.executescript("DROP TABLE IF EXISTS meta; DROP TABLE IF EXISTS docs; "
+                                    "DROP TABLE IF EXISTS stories_fts;")
+        self.conn.executescript(SCHEMA)
+        self.added = self.updated = self.deleted = 0
+
+    def _meta(self, key):
+        try:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        except sqlite3.OperationalError:  # no meta table yet
+            return None
+        return row and row[0]
+
+    def _set_meta(self, **values):
+        self.conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", values.items())
+
+    def sync(self):
+        """Bring the index up to date with the catalogue.
+
+        Returns False if it already was, True if the catalogue was re-read.
+        """
+        stat = os.stat(self.catalogue)
+        if (self._meta("mtime_ns"), self._meta("size")) == (stat.st_mtime_ns, stat.st_size):
+            return False
+        digest = file_hash(self.catalogue)
+        if self._meta("sha256") == digest:
+            with self.conn:
+                self._set_meta(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            return False
+
+        stored = {(story_id, occurrence): (rowid, story_hash) for rowid, story_id, occurrence, story_hash
+                  in self.conn.execute("SELECT rowid, id, occurrence, hash FROM docs")}
+        seen = Counter()
+        self.added = self.updated = 0
+        with self.conn:
+            for story in load_objects(self.catalogue):
+                story_id = str(story.get("id"))
+                occurrence = seen[story_id]
+                seen[story_id] += 1
+                story_hash = content_hash(story)
+                rowid, old = stored.pop((story_id, occurrence), (None, None))
+                if old == story_hash:
+                    continue
+                if rowid is None:
+                    self.added += 1
+                    rowid = self.conn.execute("INSERT INTO docs VALUES (?, ?, ?)",
+                                              (story_id, occurrence, story_hash)).lastrowid
+                else:
+                    self.updated += 1
+                    self.conn.execute("UPDATE docs SET hash = ? WHERE rowid = ?", (story_hash, rowid))
+                    self.conn.execute("DELETE FROM stories_fts WHERE rowid = ?", (rowid,))
+                self.conn.execute(
+                    f"INSERT INTO stories_fts (rowid, {', '.join(COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                    (rowid, story_id, story.get("role"), story.get("epic"), story.get("story"),
+                     "\n".join(map(str, story.get("criteria") or ()))),
+                )
+            self.deleted = len(stored)
+            for rowid, _ in stored.values():
+                self.conn.execute("DELETE FROM docs WHERE rowid = ?", (rowid,))
+                self.conn.execute("DELETE FROM stories_fts WHERE rowid = ?", (rowid,))
+            self._set_meta(mtime_ns=stat.st_mtime_ns, size=stat.st_size, sha256=digest,
+                           version=SEARCH_VERSION)
+        return True
+
+    def search(self, query, limit=10, raw=False):
+        """The best ``limit`` stories for ``query``, best first.
+
+        Each hit is a dict with id, role, epic, story, score (higher is
+        better) and a criteria snippet with the matched terms in [brackets],
+        or None when the criteria did not match. With ``raw`` the query is
+        passed to FTS5 as is (OR, NOT, NEAR, column filters).
+        """
+        expression = query if raw else match_expression(query)
+        if not expression:
+            return []
+        weights = ", ".join(map(str, WEIGHTS))
+        criteria = COLUMNS.index("criteria")
+        rows = self.conn.execute(
+            f"SELECT id, role, epic, story, bm25(stories_fts, {weights}) AS rank, "
+            f"snippet(stories_fts, {criteria}, char(2), char(3), '…', 12) "
+            f"FROM stories_fts WHERE stories_fts MATCH ? ORDER BY rank LIMIT ?",
+            (expression, limit),
+        )
+        return [{"id": story_id, "role": role, "epic": epic, "story": story, "score": round(-rank, 3),
+                 "criteria": _highlight(snippet)}
+                for story_id, role, epic, story, rank, snippet in rows]
+
+    def __len__(self):
+        return self.conn.execute("SELECT count(*) FROM docs").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
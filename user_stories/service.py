@@ -0,0 +1,229 @@
+"""Local HTTP render service with an in-memory LRU of rendered outputs.
+
+    python -m user_stories serve [--host 127.0.0.1] [--port 8765]
+
+    GET  /render?format=xlsx&role=Admin&epic=BILLING&ids=US-43,US-44&sprint=12
+    POST /render   {"format": "csv", "role": "User", "ids": ["US-29", "US-30"]}
+    GET  /health
+
+Every filter is optional and combined with AND. ``role``, ``epic`` and
+``sprint`` take one value or a list; ``sprint`` matches a story's optional
+``sprint`` field. ``format`` is xlsx (default), csv, md, jsonl or json.
+
+Rendered bodies are kept in a ``RenderCache``, an LRU bounded by entry
+count and total bytes. The key is the catalogue's content hash plus the
+normalised filter spec, so a repeated request is answered from memory
+(``X-Cache: hit``). Editing the catalogue changes the hash, and stale
+entries age out on their own. The server binds to localhost by default and
+has no authentication; it is meant for tools on the same machine.
+"""
+
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from .loaders import DEFAULT_CATALOGUE, catalogue_hash, load_stories
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+CACHE_ENTRIES = 128
+CACHE_BYTES = 64 << 20
+MAX_BODY = 1 << 20
+FILTERS = ("role", "epic", "sprint", "ids")
+
+CONTENT_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv; charset=utf-8",
+    "md": "text/markdown; charset=utf-8",
+    "jsonl": "application/x-ndjson; charset=utf-8",
+    "json": "application/json; charset=utf-8",
+}
+
+
+class SpecError(ValueError):
+    """A filter spec the service cannot serve."""
+
+
+def _values(value):
+    if value is None:
+        return ()
+    if isinstance(value, str):
+        value = value.split(",")
+    elif not isinstance(value, (list, tuple)):
+        value = [value]
+    return tuple(sorted({str(item).strip() for item in value if str(item).strip()}))
+
+
+def normalise_spec(spec):
+    """``(format, filters)`` with filters as a sorted tuple, usable as a cache key."""
+    unknown = set(spec) - set(FILTERS) - {"format"}
+    if unknown:
+        raise SpecError(f"unknown filter {', '.join(sorted(unknown))}; expected {', '.join(FILTERS)}")
+    fmt = str(spec.get("format") or "xlsx").lower()
+    if fmt not in CONTENT_TYPES:
+        raise SpecError(f"unknown format {fmt!r}; expected {', '.join(CONTENT_TYPES)}")
+    filters = tuple((name, values) for name in FILTERS if (values := _values(spec.get(name))))
+    return fmt, filters
+
+
+def matches(story, filters):
+    for name, values in filters:
+        field = "id" if name == "ids" else name
+        value = story.get(field)
+        if value is None or str(value) not in values:
+            return False
+    return True
+
+
+def filter_stories(stories, filters):
+    for story in stories:
+        if matches(story, filters):
+            yield story
+
+
+def render(stories, fmt):
+    """The body for ``stories`` in ``fmt``, rendered by the normal writers."""
+    if fmt == "json":
+        return json.dumps(list(stories), ensure_ascii=False).encode("utf-8")
+    from .writers import export
+
+    fd, path = tempfile.mkstemp(suffix="." + fmt, prefix="user-stories-")
+    os.close(fd)
+    try:
+        export(stories, [path])
+        with open(path, "rb") as fp:
+            return fp.read()
+    finally:
+        os.unlink(path)
+
+
+class RenderCache:
+    """Thread-safe LRU of rendered bodies, bounded by entries and total bytes."""
+
+    def __init__(self, max_entries=CACHE_ENTRIES, max_bytes=CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            body = self.entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self.entries[key] = body
+            self.size += len(body)
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def stats(self):
+        with self.lock:
+            return {"entries": len(self.entries), "bytes": self.size, "hits": self.hits, "misses": self.misses}
+
+
+class RenderService:
+    def __init__(self, catalogue=DEFAULT_CATALOGUE, cache=None):
+        self.catalogue = catalogue
+        self.cache = cache or RenderCache()
+
+    def render(self, spec):
+        """``(body, fmt, cached)`` for a filter spec."""
+        fmt, filters = normalise_spec(spec)
+        key = (catalogue_hash(self.catalogue), fmt, filters)
+        body = self.cache.get(key)
+        if body is not None:
+            return body, fmt, True
+        body = render(filter_stories(load_stories(self.catalogue), filters), fmt)
+        self.cache.put(key, body)
+        return body, fmt, False
+
+
+class RenderHandler(BaseHTTPRequestHandler):
+    service = None  # set by make_server
+
+    def _send(self, status, body, content_type, headers=()):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, value):
+        self._send(status, json.dumps(value).encode("utf-8"), CONTENT_TYPES["json"])
+
+    def _render(self, spec):
+        try:
+            body, fmt, cached = self.service.render(spec)
+        except SpecError as exc:
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(exc)})
+            return
+        except Exception as exc:  # a bad story, an unreadable catalogue: answer rather than drop the socket
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR,
+                            {"error": f"render failed: {type(exc).__name__}: {exc}"})
+            return
+        self._send(HTTPStatus.OK, body, CONTENT_TYPES[fmt], [
+            ("X-Cache", "hit" if cached else "miss"),
+            ("Content-Disposition", f'attachment; filename="user_stories.{fmt}"'),
+        ])
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/health":
+            self._send_json(HTTPStatus.OK, {"status": "ok", "cache": self.service.cache.stats()})
+        elif url.path == "/render":
+            self._render({name: values[-1] for name, values in parse_qs(url.query).items()})
+        else:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": f"no such endpoint {url.path}"})
+
+    def do_POST(self):
+        if urlsplit(self.path).path != "/render":
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": f"no such endpoint {self.path}"})
+            return
+        length = self.headers.get("Content-Length") or "0"
+        # int() would also take "-1", and read(-1) blocks until the client closes
+        if not (length.isascii() and length.isdigit()):
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": "Content-Length must be a non-negative integer"})
+            return
+        length = int(length)
+        if length > MAX_BODY:
+            self._send_json(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "filter spec too large"})
+            return
+        try:
+            spec = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": "body is not JSON"})
+            return
+        if not isinstance(spec, dict):
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": "filter spec must be a JSON object"})
+            return
+        self._render(spec)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    handler = type("BoundRenderHandler", (RenderHandler,), {"service": service})
+    return ThreadingHTTPServer((host, port), handler)
@@ -0,0 +1,159 @@
+"""Sharded generation: one sheet per epic, rendered in a process pool.
+
+Stories are streamed once and partitioned by ``epic`` into temporary JSONL
+shards. Each shard is rendered to its own workbook by a worker process with
+the streaming writer, and the finished worksheet parts are copied into a
+single multi-sheet package behind an index sheet. Every shard registers the
+looks in the same order (see styles.register_styles), so all of them share
+one styles.xml and their worksheets can be merged without touching a cell.
+
+Parallelism is bounded by the number of epics; a single huge epic is still
+rendered by one worker. The intermediate workbooks are stored uncompressed,
+since merge inflates their sheets again anyway; only the merged package is
+deflated, optionally in parallel (see compression.py).
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+
+from . import styles
+from .compression import DEFAULT, open_zip, save_workbook, write_parallel, zip_settings
+from .loaders import iter_jsonl
+from .profiling import span
+from .workbook import HEADER_HEIGHT, write_workbook_streaming
+from .xlsxzip import sheet_part, sheet_titles, write_package
+
+INDEX_TITLE = "Index"
+INDEX_HEADERS = ["Epic", "Sheet", "Stories", "User", "Admin"]
+INDEX_WIDTHS = {"A": 36, "B": 36, "C": 10, "D": 10, "E": 10}
+DEFAULT_EPIC = "Stories"
+# compression of the per-shard and index workbooks, which only live until the merge
+PART_COMPRESSION = "stored"
+
+_SHEET = "xl/worksheets/sheet1.xml"
+_STYLES = "xl/styles.xml"
+_THEME = "xl/theme/theme1.xml"
+
+
+class Shard:
+    __slots__ = ("epic", "path", "count", "roles")
+
+    def __init__(self, epic, path):
+        self.epic = epic
+        self.path = path
+        self.count = 0
+        self.roles = Counter()
+
+
+def partition(stories, directory):
+    """Stream ``stories`` into one JSONL file per epic, in first-seen order."""
+    shards, files = {}, {}
+    try:
+        for story in stories:
+            epic = str(story.get("epic") or DEFAULT_EPIC)
+            shard = shards.get(epic)
+            if shard is None:
+                shard = shards[epic] = Shard(epic, Path(directory) / f"shard{len(shards)}.jsonl")
+                files[epic] = open(shard.path, "w", encoding="utf-8")
+            files[epic].write(json.dumps(story, ensure_ascii=False) + "\n")
+            shard.count += 1
+            shard.roles[story["role"]] += 1
+    finally:
+        for fp in files.values():
+            fp.close()
+    return list(shards.values())
+
+
+def render_shard(shard_path, output_path):
+    """Worker: render one shard to a standalone workbook."""
+    return write_workbook_streaming(iter_jsonl(shard_path), output_path, compression=PART_COMPRESSION)
+
+
+def _index_cell(ws, value, style=styles.ID):
+    cell = WriteOnlyCell(ws, value=value)
+    cell.style = style
+    return cell
+
+
+def render_index(shards, titles, output_path):
+    """The index sheet: one row per epic with a link to its sheet."""
+    wb = Workbook(write_only=True)
+    styles.register_styles(wb)
+    ws = wb.create_sheet(INDEX_TITLE)
+    for letter, width in INDEX_WIDTHS.items():
+        ws.column_dimensions[letter].width = width
+    ws.row_dimensions[1].height = HEADER_HEIGHT
+    ws.append([_index_cell(ws, header, styles.HEADER) for header in INDEX_HEADERS])
+    for shard, title in zip(shards, titles):
+        quoted = title.replace("'", "''")
+        link = title.replace('"', '""')
+        ws.append([
+            _index_cell(ws, shard.epic),
+            _index_cell(ws, f"=HYPERLINK(\"#'{quoted}'!A1\",\"{link}\")"),
+            _index_cell(ws, shard.count),
+            _index_cell(ws, shard.roles["User"]),
+            _index_cell(ws, shard.roles["Admin"]),
+        ])
+    save_workbook(wb, output_path, PART_COMPRESSION)
+
+
+def merge(parts, titles, output_path, compression=DEFAULT, parallel=False):
+    """Copy the worksheet of each single-sheet workbook in ``parts`` into one package."""
+    with zipfile.ZipFile(parts[0]) as first:
+        styles_xml = first.read(_STYLES)
+        theme_xml = first.read(_THEME) if _THEME in first.namelist() else None
+
+    compress_type, level = zip_settings(compression)
+    workers = os.cpu_count() or 1
+    pool = ThreadPoolExecutor(max_workers=workers) if parallel and compress_type == zipfile.ZIP_DEFLATED else None
+    with open_zip(output_path, compression) as out:
+        write_package(out, titles, styles_xml, theme_xml)
+        for index, part in enumerate(parts, 1):
+            with zipfile.ZipFile(part) as src:
+                if src.read(_STYLES) != styles_xml:
+                    raise RuntimeError(f"{part}: shard styles differ, cannot merge worksheets")
+                with src.open(_SHEET) as sheet:
+                    if pool is not None:
+                        write_parallel(out, sheet_part(index), [sheet], src.getinfo(_SHEET).file_size,
+                                       level, pool, 2 * workers)
+                        continue
+                    with out.open(sheet_part(index), "w") as dest:
+                        shutil.copyfileobj(sheet, dest, 1 << 20)
+    if pool is not None:
+        pool.shutdown()
+
+
+def write_workbook_sharded(stories, output_path, workers=None, compression=DEFAULT, parallel=False):
+    """Render one sheet per epic in parallel and merge them behind an index.
+
+    ``compression`` and ``parallel`` apply to the merged workbook. Returns
+    the number of stories written.
+    """
+    workers = workers or os.cpu_count() or 1
+    with tempfile.TemporaryDirectory(prefix="user-stories-") as tmp:
+        with span("partition"):
+            shards = partition(stories, tmp)
+        titles = sheet_titles([INDEX_TITLE] + [shard.epic for shard in shards])
+        index_path = Path(tmp) / "index.xlsx"
+        shard_paths = [Path(tmp) / f"shard{n}.xlsx" for n in range(len(shards))]
+
+        with span("render"), ProcessPoolExecutor(max_workers=workers) as pool:
+            # biggest shards first so a large epic does not start last
+            order = sorted(range(len(shards)), key=lambda n: shards[n].count, reverse=True)
+            futures = [pool.submit(render_shard, shards[n].path, shard_paths[n]) for n in order]
+            render_index(shards, titles[1:], index_path)
+            for future in futures:
+                future.result()
+
+        with span("save"):
+            merge([index_path] + shard_paths, titles, output_path, compression, parallel)
+    return sum(shard.count for shard in shards)
@@ -0,0 +1,124 @@
+"""Cell styles for the acceptance criteria workbook.
+
+Every look is registered once per workbook as a ``NamedStyle`` so a cell is
+styled with a single ``cell.style = name`` assignment instead of separate
+font, fill, alignment and border objects that openpyxl has to hash and
+dedupe on every cell.
+"""
+
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+from openpyxl.styles.fonts import DEFAULT_FONT
+
+from .palette import (HEADER_COLOR, HEADER_FONT_COLOR, USER_COLOR, ADMIN_COLOR, CRITERIA_COLOR, FONT_SIZE,
+                      ADDED_COLOR, REMOVED_COLOR, MODIFIED_COLOR)
+from .profiling import span
+
+# Define styles
+header_fill = PatternFill(start_color=HEADER_COLOR, end_color=HEADER_COLOR, fill_type="solid")
+header_font = Font(bold=True, color=HEADER_FONT_COLOR, size=FONT_SIZE)
+user_fill = PatternFill(start_color=USER_COLOR, end_color=USER_COLOR, fill_type="solid")
+admin_fill = PatternFill(start_color=ADMIN_COLOR, end_color=ADMIN_COLOR, fill_type="solid")
+criteria_fill = PatternFill(start_color=CRITERIA_COLOR, end_color=CRITERIA_COLOR, fill_type="solid")
+added_fill = PatternFill(start_color=ADDED_COLOR, end_color=ADDED_COLOR, fill_type="solid")
+removed_fill = PatternFill(start_color=REMOVED_COLOR, end_color=REMOVED_COLOR, fill_type="solid")
+modified_fill = PatternFill(start_color=MODIFIED_COLOR, end_color=MODIFIED_COLOR, fill_type="solid")
+
+border = Border(
+    left=Side(style='thin'),
+    right=Side(style='thin'),
+    top=Side(style='thin'),
+    bottom=Side(style='thin')
+)
+
+header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+center_alignment = Alignment(horizontal="center", vertical="top")
+wrap_alignment = Alignment(horizontal="left", vertical="top", wrap_text=True)
+
+HEADER = "Story Header"
+ID = "Story ID"
+USER_STORY = "User Story"
+USER_ROLE = "User Role"
+ADMIN_STORY = "Admin Story"
+ADMIN_ROLE = "Admin Role"
+CRITERIA = "Acceptance Criteria"
+
+# name -> (font, fill, alignment); every look shares the thin border
+LOOKS = {
+    HEADER: (header_font, header_fill, header_alignment),
+    ID: (None, None, center_alignment),
+    USER_STORY: (None, user_fill, wrap_alignment),
+    USER_ROLE: (None, user_fill, center_alignment),
+    ADMIN_STORY: (None, admin_fill, wrap_alignment),
+    ADMIN_ROLE: (None, admin_fill, center_alignment),
+    CRITERIA: (None, criteria_fill, wrap_alignment),
+}
+
+ADDED = "Diff Added"
+REMOVED = "Diff Removed"
+MODIFIED = "Diff Modified"
+
+# looks of the diff sheet, registered only in diff workbooks
+DIFF_LOOKS = {
+    ADDED: (None, added_fill, wrap_alignment),
+    REMOVED: (None, removed_fill, wrap_alignment),
+    MODIFIED: (None, modified_fill, wrap_alignment),
+}
+
+TEXT = "Story Text"
+
+# looks of the --table layout, where the fills come from conditional formatting
+TABLE_LOOKS = {
+    TEXT: (None, None, wrap_alignment),
+}
+
+HEADER_STYLES = (HEADER,) * 4
+USER_ROW_STYLES = (ID, USER_STORY, USER_ROLE, CRITERIA)
+ADMIN_ROW_STYLES = (ID, ADMIN_STORY, ADMIN_ROLE, CRITERIA)
+TABLE_ROW_STYLES = (ID, TEXT, ID, TEXT)
+
+
+def named_style(name, looks=LOOKS):
+    font, fill, alignment = looks[name]
+    style = NamedStyle(name=name, font=font or DEFAULT_FONT, border=border, alignment=alignment)
+    if fill is not None:
+        style.fill = fill
+    return style
+
+
+def register_styles(wb):
+    """Add every look to ``wb`` as a named style.
+
+    Named styles are bound to a single workbook, so this runs once for each
+    workbook that is built.
+    """
+    with span("styles"):
+        existing = set(wb.named_styles)
+        for name in LOOKS:
+            if name not in existing:
+                wb.add_named_style(named_style(name))
+        # Seed the cell-format table in LOOKS order, so every workbook built
+        # here gets the same xf ids and a byte-identical styles.xml whatever
+        # order its rows use the looks in. Merged shards rely on this.
+        for style in wb._named_styles:
+            if style.name in LOOKS:
+                wb._cell_styles.add(style.as_tuple())
+
+
+def _register_looks(wb, looks):
+    existing = set(wb.named_styles)
+    for name in looks:
+        if name not in existing:
+            wb.add_named_style(named_style(name, looks))
+
+
+def register_diff_styles(wb):
+    _register_looks(wb, DIFF_LOOKS)
+
+
+def register_table_styles(wb):
+    _register_looks(wb, TABLE_LOOKS)
+
+
+def row_styles(story):
+    """Style names for the four cells of a story row."""
+    return ADMIN_ROW_STYLES if story["role"] == "Admin" else USER_ROW_STYLES
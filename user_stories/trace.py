@@ -0,0 +1,149 @@
+"""Traceability between stories and the server code that implements them.
+
+Stories name their implementing functions in an optional ``handlers`` list
+(e.g. US-29 -> ``BuyProduct``). ``scan`` walks ``server/src`` once. Each
+.js file is parsed a single time, through a FileCache, for the functions it
+defines, the routes it declares and, for app.js, the router mount prefixes.
+A ``TraceIndex`` built from the scan is then fed the stories as they stream
+past and keeps both directions:
+
+    story ID -> handlers (with their definition and routes)
+    handler  -> story IDs
+
+From these come the gaps: stories with no handler, handlers named by a
+story but not found in the code, and route handlers no story covers.
+
+    python -m user_stories trace [--json]
+"""
+
+import os
+import re
+from pathlib import Path
+
+from .filecache import FileCache
+from .routes import SERVER_SRC, _relative, parse_mounts, parse_router, resolve_mounts, resolve_routes, strip_comments
+
+# Bump when the scan output changes.
+TRACE_VERSION = 1
+SKIP_DIRS = frozenset({"node_modules", ".git", "dist", "build", "coverage"})
+
+_DEFINITION = re.compile(
+    r"^[ \t]*(?:export\s+)?(?:default\s+)?(?:"
+    r"(?:async\s+)?function\s*\*?\s*([A-Za-z_$][\w$]*)\s*\("
+    r"|(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*=\s*(?:\w+\s*\(\s*)?(?:async\s*)?(?:function\b|\([^)]*\)\s*=>|[\w$]+\s*=>)"
+    r")",
+    re.M,
+)
+_ROUTER = re.compile(r"\bRouter\s*\(")
+
+
+def parse_source(source):
+    """Functions defined, routes declared and routers mounted in one JS file."""
+    stripped = strip_comments(source)
+    definitions = {}
+    for match in _DEFINITION.finditer(stripped):
+        name = match.group(1) or match.group(2)
+        definitions.setdefault(name, stripped.count("\n", 0, match.start()) + 1)
+    return {
+        "definitions": definitions,
+        "routes": parse_router(source) if _ROUTER.search(stripped) else [],
+        "mounts": parse_mounts(source),
+    }
+
+
+def _js_files(server_src):
+    for directory, dirs, files in os.walk(server_src):
+        dirs[:] = sorted(name for name in dirs if name not in SKIP_DIRS)
+        for name in sorted(files):
+            if name.endswith((".js", ".mjs", ".cjs")):
+                yield Path(directory) / name
+
+
+def scan(server_src=SERVER_SRC, cache=None):
+    """Read every JS file under ``server_src`` once.
+
+    Returns ``(definitions, routes)``: function name -> "path:line" of its
+    first definition, and the resolved routes as routes.extract_routes
+    returns them.
+    """
+    server_src = Path(server_src)
+    own_cache = cache is None
+    if own_cache:
+        cache = FileCache("trace", TRACE_VERSION)
+
+    root = server_src.resolve().parent.parent
+    definitions, parsed, mounts = {}, [], {}
+    for path in _js_files(server_src):
+        result = cache.get(path, parse_source)
+        location = _relative(path.resolve(), root)
+        for name, line in result["definitions"].items():
+            definitions.setdefault(name, f"{location}:{line}")
+        if result["routes"]:
+            parsed.append((path, result["routes"]))
+        mounts.update(resolve_mounts(result["mounts"], path.parent))
+
+    routes = []
+    for path, file_routes in parsed:
+        routes.extend(resolve_routes(path, file_routes, mounts, server_src))
+    if own_cache:
+        cache.save()
+    return definitions, routes
+
+
+class TraceIndex:
+    """Story <-> handler links, filled from a single pass over the stories."""
+
+    def __init__(self, definitions, routes):
+        self.definitions = definitions
+        self.routes = {}
+        for route in routes:
+            if route["handler"] != "<inline>":
+                self.routes.setdefault(route["handler"], []).append(route)
+        self.story_handlers = {}
+        self.handler_stories = {}
+
+    @classmethod
+    def from_source(cls, server_src=None, cache=None):
+        return cls(*scan(server_src or SERVER_SRC, cache))
+
+    def add(self, story):
+        story_id = story.get("id")
+        handlers = list(story.get("handlers") or ())
+        self.story_handlers[story_id] = handlers
+        for handler in handlers:
+            self.handler_stories.setdefault(handler, []).append(story_id)
+
+    def tap(self, stories):
+        """Pass ``stories`` through unchanged, indexing each one on the way."""
+        for story in stories:
+            self.add(story)
+            yield story
+
+    def endpoints(self, handler):
+        return [f"{route['method']} {route['endpoint']}" for route in self.routes.get(handler, ())]
+
+    def stories_without_handler(self):
+        return [story_id for story_id, handlers in self.story_handlers.items() if not handlers]
+
+    def unknown_handlers(self):
+        """Handlers named by stories that are not defined under server/src."""
+        return {handler: story_ids for handler, story_ids in self.handler_stories.items()
+                if handler not in self.definitions}
+
+    def handlers_without_story(self):
+        """Route handlers no story links to."""
+        return [handler for handler in self.routes if handler not in self.handler_stories]
+
+    def as_dict(self):
+        return {
+            "stories": {
+                story_id: [{"handler": handler, "defined": self.definitions.get(handler),
+                            "routes": self.endpoints(handler)} for handler in handlers]
+                for story_id, handlers in self.story_handlers.items()
+            },
+            "handlers": self.handler_stories,
+            "stories_without_handler": self.stories_without_handler(),
+            "unknown_handlers": self.unknown_handlers(),
+            "handlers_without_story": {handler: self.endpoints(handler)
+                                       for handler in self.handlers_without_story()},
+        }
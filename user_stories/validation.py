@@ -0,0 +1,100 @@
+"""Catalogue validation in a single pass.
+
+``validate`` walks the stories once, as they stream in, and yields every
+problem it finds instead of stopping at the first one. Each story is
+checked on its own, except for duplicate IDs, which are found with a dict
+from ID to the position that first used it. That dict is the only state
+kept, so a million-story catalogue is checked in O(n) time with memory
+for the IDs alone.
+
+Checks:
+
+    missing-field   id, role, story or criteria is absent
+    duplicate-id    the ID was already used by an earlier story
+    unknown-role    role is not one of ROLES
+    no-i-want       the story has no "I want", so column B cannot be built
+    no-criteria     criteria is empty, not a list, or has blank entries
+"""
+
+from .records import Story
+from .rows import ROLES
+
+REQUIRED_FIELDS = ("id", "role", "story", "criteria")
+STORY_MARKER = "I want"
+
+
+class Problem:
+    __slots__ = ("position", "story_id", "code", "message")
+
+    def __init__(self, position, story_id, code, message):
+        self.position = position
+        self.story_id = story_id
+        self.code = code
+        self.message = message
+
+    def __str__(self):
+        return f"story #{self.position} ({self.story_id or '?'}): {self.code}: {self.message}"
+
+    def as_dict(self):
+        return {"position": self.position, "id": self.story_id, "code": self.code, "message": self.message}
+
+
+class Validator:
+    """Checks stories one at a time; ``total`` and ``problems`` count as it goes."""
+
+    def __init__(self, roles=ROLES):
+        self.roles = frozenset(roles)
+        self.seen = {}
+        self.total = 0
+        self.problems = 0
+
+    def check(self, story):
+        self.total += 1
+        position = self.total
+        if not isinstance(story, (dict, Story)):
+            self.problems += 1
+            yield Problem(position, None, "missing-field", f"expected an object, got {type(story).__name__}")
+            return
+        story_id = story.get("id")
+        found = []
+
+        missing = [field for field in REQUIRED_FIELDS if story.get(field) in (None, "")]
+        if missing:
+            found.append(Problem(position, story_id, "missing-field", f"no {', '.join(missing)}"))
+
+        if story_id not in (None, ""):
+            key = story_id if isinstance(story_id, (str, int)) else repr(story_id)
+            first = self.seen.setdefault(key, position)
+            if first != position:
+                found.append(Problem(position, story_id, "duplicate-id", f"already used by story #{first}"))
+
+        role = story.get("role")
+        # a list or dict role cannot be looked up in the set, and is unknown anyway
+        if role not in (None, "") and (not isinstance(role, str) or role not in self.roles):
+            found.append(Problem(position, story_id, "unknown-role",
+                                 f"{role!r} is not one of {', '.join(sorted(self.roles))}"))
+
+        text = story.get("story")
+        if text not in (None, ""):
+            if not isinstance(text, str) or STORY_MARKER not in text:
+                found.append(Problem(position, story_id, "no-i-want", f"story text has no {STORY_MARKER!r}"))
+
+        criteria = story.get("criteria")
+        if criteria is not None:
+            if not isinstance(criteria, (list, tuple)) or not criteria:
+                found.append(Problem(position, story_id, "no-criteria", "no acceptance criteria"))
+            else:
+                blank = [n for n, line in enumerate(criteria, 1) if not isinstance(line, str) or not line.strip()]
+                if blank:
+                    found.append(Problem(position, story_id, "no-criteria",
+                                         f"criteria line {', '.join(map(str, blank))} is blank"))
+
+        self.problems += len(found)
+        yield from found
+
+
+def validate(stories, roles=ROLES):
+    """Yield every Problem in ``stories``, in catalogue order."""
+    validator = Validator(roles)
+    for story in stories:
+        yield from validator.check(story)
@@ -0,0 +1,67 @@
+"""Rebuild on change from a long-lived process.
+
+``watch`` polls the story sources with ``os.stat`` (no extra dependency,
+and a handful of stat calls per poll is nothing next to a rebuild). When
+their mtime or size moves, it waits until they have been still for the
+debounce period and then calls ``rebuild`` once. Editors that save through
+a temporary file and a rename, or write in several chunks, therefore
+trigger a single rebuild.
+
+The process stays up between rebuilds, so the interpreter, openpyxl and
+the style objects are loaded once. A rebuild costs only the render.
+Failed rebuilds, such as a catalogue saved half-edited with a syntax
+error, are reported and the watch goes on.
+"""
+
+import os
+import time
+import traceback
+
+POLL_INTERVAL = 0.1
+DEBOUNCE = 0.25
+
+
+def _signature(paths):
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            signature.append(None)
+        else:
+            signature.append((stat.st_mtime_ns, stat.st_size))
+    return signature
+
+
+def watch(paths, rebuild, poll=POLL_INTERVAL, debounce=DEBOUNCE, stop=None):
+    """Call ``rebuild()`` now and after every settled change to ``paths``.
+
+    Runs until ``stop()`` returns true, or forever without one.
+    """
+    _run(rebuild)
+    last = _signature(paths)
+    while stop is None or not stop():
+        time.sleep(poll)
+        current = _signature(paths)
+        if current == last:
+            continue
+        settled = time.monotonic() + debounce
+        while time.monotonic() < settled:
+            time.sleep(poll)
+            latest = _signature(paths)
+            if latest != current:
+                current = latest
+                settled = time.monotonic() + debounce
+        last = current
+        if None not in current:  # a rename in progress, wait for the file to reappear
+            _run(rebuild)
+
+
+def _run(rebuild):
+    try:
+        rebuild()
+    except ValueError as error:  # a catalogue problem, e.g. a story without "I want"
+        print(f"✗ Rebuild failed: {error}, waiting for the next change", flush=True)
+    except Exception:
+        traceback.print_exc()
+        print("✗ Rebuild failed, waiting for the next change", flush=True)
@@ -0,0 +1,270 @@
+"""Render user stories into the acceptance criteria workbook."""
+
+import warnings
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.formatting.rule import FormulaRule
+from openpyxl.worksheet.filters import AutoFilter
+from openpyxl.worksheet.table import Table, TableColumn, TableStyleInfo
+
+from . import styles
+from .compression import DEFAULT, save_workbook
+from .layout import AutoFit
+from .profiling import measure, span
+from .rows import COLUMN_WIDTHS, HEADER_HEIGHT, HEADERS, SHEET_TITLE, row_height, story_values
+
+
+def _setup_sheet(ws):
+    ws.title = SHEET_TITLE
+    for letter, width in COLUMN_WIDTHS.items():
+        ws.column_dimensions[letter].width = width
+
+
+def write_story_row(ws, row, story, fit=None, table=False):
+    """Fill (or overwrite) one story row of an in-memory worksheet.
+
+    With a layout.AutoFit the row is sized to its content instead of by
+    criteria count. With ``table`` the cells get the unfilled table looks
+    and format_as_table supplies the colours.
+    """
+    values = story_values(story)
+    row_styles = styles.TABLE_ROW_STYLES if table else styles.row_styles(story)
+    for col, (value, style) in enumerate(zip(values, row_styles), 1):
+        ws.cell(row=row, column=col, value=value).style = style
+    if fit is None:
+        ws.row_dimensions[row].height = measure("row_height", row_height, story)
+    else:
+        ws.row_dimensions[row].height = measure("row_height", fit.row_height, values)
+
+
+def new_workbook(table=False):
+    """An in-memory workbook with the styles registered and the header row written."""
+    wb = Workbook()
+    styles.register_styles(wb)
+    if table:
+        styles.register_table_styles(wb)
+    ws = wb.active
+    _setup_sheet(ws)
+
+    # Add headers
+    for col, header in enumerate(HEADERS, 1):
+        ws.cell(row=1, column=col, value=header).style = styles.HEADER
+    ws.row_dimensions[1].height = HEADER_HEIGHT
+    return wb
+
+
+TABLE_NAME = "UserStories"
+TABLE_STYLE = "TableStyleLight1"
+
+
+def format_as_table(ws, last_row):
+    """Make rows 1..``last_row`` an Excel Table coloured by conditional formatting.
+
+    The role colour of columns B and C and the criteria colour of column D
+    are declared once as rules over the whole range instead of as a fill on
+    every cell. The Table adds the autofilter and row banding. The header
+    cells keep their own look, which takes precedence over the table style.
+    """
+    last_row = max(last_row, 2)  # a Table needs at least one data row
+    ws.conditional_formatting.add(f"B2:C{last_row}",
+                                  FormulaRule(formula=['$C2="Admin"'], fill=styles.admin_fill, stopIfTrue=True))
+    ws.conditional_formatting.add(f"B2:C{last_row}", FormulaRule(formula=["TRUE"], fill=styles.user_fill))
+    ws.conditional_formatting.add(f"D2:D{last_row}", FormulaRule(formula=["TRUE"], fill=styles.criteria_fill))
+    ref = f"A1:D{last_row}"
+    table = Table(displayName=TABLE_NAME, ref=ref, autoFilter=AutoFilter(ref=ref),
+                  tableColumns=[TableColumn(id=n, name=name) for n, name in enumerate(HEADERS, 1)],
+                  tableStyleInfo=TableStyleInfo(name=TABLE_STYLE, showRowStripes=True))
+    with warnings.catch_warnings():
+        # write-only sheets warn about table columns even when they are given
+        warnings.filterwarnings("ignore", "In write-only mode you must add table columns manually")
+        ws.add_table(table)
+
+
+def build_workbook(stories, autofit=False, table=False):
+    """Build the whole sheet in memory and return the workbook.
+
+    ``autofit`` sizes rows and columns to their content (see layout.py).
+    ``table`` colours the rows by conditional formatting inside an Excel
+    Table instead of per-cell fills (see format_as_table).
+    """
+    wb = new_workbook(table)
+    ws = wb.active
+    fit = AutoFit() if autofit else None
+
+    # Add data to worksheet
+    with span("rows"):
+        for row, story in enumerate(stories, 2):
+            write_story_row(ws, row, story, fit, table)
+    if fit is not None:
+        ws.row_dimensions[1].height = fit.header_height
+        for letter, width in fit.column_widths().items():
+            ws.column_dimensions[letter].width = width
+    if table:
+        format_as_table(ws, ws.max_row)
+    return wb
+
+
+COVERAGE_TITLE = "Coverage"
+COVERAGE_HEADERS = ["Gap", "Name", "Location", "Linked"]
+COVERAGE_WIDTHS = {"A": 24, "B": 32, "C": 50, "D": 50}
+
+
+def add_coverage_sheet(wb, index):
+    """A sheet listing the gaps in a trace.TraceIndex."""
+    ws = wb.create_sheet(COVERAGE_TITLE)
+    for letter, width in COVERAGE_WIDTHS.items():
+        ws.column_dimensions[letter].width = width
+    rows = [("Story without handler", story_id, "", "") for story_id in index.stories_without_handler()]
+    rows += [("Unknown handler", handler, "", ", ".join(story_ids))
+             for handler, story_ids in index.unknown_handlers().items()]
+    rows += [("Handler without story", handler, index.definitions.get(handler, ""),
+              ", ".join(index.endpoints(handler))) for handler in index.handlers_without_story()]
+    if not rows:
+        rows = [("None", "every story has a handler and every route a story", "", "")]
+    for col, header in enumerate(COVERAGE_HEADERS, 1):
+        ws.cell(row=1, column=col, value=header).style = styles.HEADER
+    ws.row_dimensions[1].height = HEADER_HEIGHT
+    for row, values in enumerate(rows, 2):
+        for col, value in enumerate(values, 1):
+            ws.cell(row=row, column=col, value=value).style = styles.ID
+    return ws
+
+
+DIFF_TITLE = "Diff"
+DIFF_HEADERS = ["ID", "Change", "Field", "Old", "New"]
+DIFF_WIDTHS = {"A": 10, "B": 12, "C": 16, "D": 60, "E": 60}
+
+
+def _diff_value(value):
+    if isinstance(value, (list, tuple)):
+        return "\n".join(map(str, value))
+    return value
+
+
+def write_diff_workbook(changes, output_path):
+    """Save diff.Change records as a sheet, coloured by kind of change."""
+    from .diff import ADDED, REMOVED
+
+    wb = Workbook()
+    styles.register_styles(wb)
+    styles.register_diff_styles(wb)
+    ws = wb.active
+    ws.title = DIFF_TITLE
+    for letter, width in DIFF_WIDTHS.items():
+        ws.column_dimensions[letter].width = width
+    for col, header in enumerate(DIFF_HEADERS, 1):
+        ws.cell(row=1, column=col, value=header).style = styles.HEADER
+    ws.row_dimensions[1].height = HEADER_HEIGHT
+    ws.freeze_panes = "A2"
+    look = {ADDED: styles.ADDED, REMOVED: styles.REMOVED}
+    row = 1
+    for row, change in enumerate(changes, 2):
+        style = look.get(change.kind, styles.MODIFIED)
+        values = [change.story_id, change.kind, change.field, _diff_value(change.old), _diff_value(change.new)]
+        for col, value in enumerate(values, 1):
+            ws.cell(row=row, column=col, value=value).style = style
+    wb.save(output_path)
+    return row - 1
+
+
+def write_workbook(stories, output_path, autofit=False, trace=None, table=False, compression=DEFAULT,
+                   parallel=False):
+    """Build the sheet in memory and save it. Returns the number of stories.
+
+    With a trace.TraceIndex the stories are indexed as they are written and
+    a coverage sheet is added after the stories. ``compression`` and
+    ``parallel`` are passed to compression.save_workbook.
+    """
+    if trace is not None:
+        stories = trace.tap(stories)
+    wb = build_workbook(stories, autofit, table)
+    if trace is not None:
+        add_coverage_sheet(wb, trace)
+    with span("save"):
+        save_workbook(wb, output_path, compression, parallel)
+    return wb.active.max_row - 1
+
+
+def _styled_row(ws, values, row_styles):
+    row = []
+    for value, style in zip(values, row_styles):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        row.append(cell)
+    return row
+
+
+class XlsxWriter:
+    """Streaming XLSX backend built on openpyxl's write-only workbook.
+
+    Rows are serialised as soon as they are written and no Cell objects are
+    retained. Strings are written inline, so nothing grows with the number
+    of rows. With ``table`` the rows are written unfilled and the Table and
+    its formatting rules are added on close, once the last row is known.
+    """
+
+    def __init__(self, output_path, table=False, compression=DEFAULT, parallel=False):
+        self.output_path = output_path
+        self.table = table
+        self.compression = compression
+        self.parallel = parallel
+        self.wb = Workbook(write_only=True)
+        styles.register_styles(self.wb)
+        if table:
+            styles.register_table_styles(self.wb)
+        self.ws = self.wb.create_sheet()
+        _setup_sheet(self.ws)
+        self.row = 1
+
+    def _append(self, values, row_styles, height):
+        # Row heights are looked up when a row is written, so each entry is
+        # added just before its row and dropped right after it.
+        dims = self.ws.row_dimensions
+        dims[self.row].height = height
+        self.ws.append(_styled_row(self.ws, values, row_styles))
+        del dims[self.row]
+        self.row += 1
+
+    def write_header(self, headers):
+        self._append(headers, styles.HEADER_STYLES, HEADER_HEIGHT)
+
+    def write_row(self, values, story):
+        row_styles = styles.TABLE_ROW_STYLES if self.table else styles.row_styles(story)
+        self._append(values, row_styles, measure("row_height", row_height, story))
+
+    def close(self):
+        if self.table:
+            format_as_table(self.ws, self.row - 1)
+        save_workbook(self.wb, self.output_path, self.compression, self.parallel)
+
+    def discard(self):
+        """Drop the rows written so far; nothing has been written to the output path yet."""
+        try:
+            # finish the sheet's XML stream before its temporary file goes
+            self.ws.close()
+            self.ws._writer.cleanup()
+        except Exception:
+            pass
+
+
+def write_workbook_streaming(stories, output_path, table=False, compression=DEFAULT, parallel=False):
+    """Save the sheet through XlsxWriter.
+
+    ``stories`` can be any iterable, including a generator. Returns the
+    number of stories written.
+    """
+    writer = XlsxWriter(output_path, table, compression, parallel)
+    writer.write_header(HEADERS)
+    count = 0
+    try:
+        with span("rows"):
+            for story in stories:
+                writer.write_row(story_values(story), story)
+                count += 1
+    except BaseException:
+        writer.discard()
+        raise
+    with span("save"):
+        writer.close()
+    return count
@@ -0,0 +1,237 @@
+"""Export backends that share one pass over the stories.
+
+Every writer receives the header once and then each row as it is built:
+
+    writer.write_header(headers)
+    writer.write_row(values, story)   # values from rows.story_values
+    writer.close()
+
+``export`` builds each row once and hands it to every writer, so a single
+run can produce several formats. The backend is picked from the output
+suffix; XLSX goes through workbook.XlsxWriter or rawxlsx.RawXlsxWriter and
+Parquet needs pyarrow, each imported only when such an output is requested.
+"""
+
+import csv
+import importlib.util
+import json
+from pathlib import Path
+
+from .compression import DEFAULT
+from .profiling import span
+from .rows import HEADERS, story_values
+
+PARQUET_BATCH = 10_000
+
+
+class CsvWriter:
+    def __init__(self, output_path):
+        self.fp = open(output_path, "w", encoding="utf-8", newline="")
+        self.writer = csv.writer(self.fp)
+
+    def write_header(self, headers):
+        self.writer.writerow(headers)
+
+    def write_row(self, values, story):
+        self.writer.writerow(values)
+
+    def close(self):
+        self.fp.close()
+
+    discard = close  # written straight to the output, so only the handle to release
+
+
+class JsonlWriter:
+    """One object per story, keyed by the header names, criteria as a list."""
+
+    def __init__(self, output_path):
+        self.fp = open(output_path, "w", encoding="utf-8")
+        self.keys = None
+
+    def write_header(self, headers):
+        self.keys = headers
+
+    def write_row(self, values, story):
+        record = dict(zip(self.keys, values))
+        record[self.keys[-1]] = list(story["criteria"])
+        self.fp.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self.fp.close()
+
+    discard = close
+
+
+def _markdown_cell(value):
+    return str(value).replace("\\", "\\\\").replace("|", "\\|").replace("\n", "<br>")
+
+
+class MarkdownWriter:
+    """A GitHub-flavoured Markdown table; criteria lines become <br>."""
+
+    def __init__(self, output_path):
+        self.fp = open(output_path, "w", encoding="utf-8")
+
+    def _line(self, cells):
+        self.fp.write("| " + " | ".join(cells) + " |\n")
+
+    def write_header(self, headers):
+        self._line([_markdown_cell(header) for header in headers])
+        self._line(["---"] * len(headers))
+
+    def write_row(self, values, story):
+        self._line([_markdown_cell(value) for value in values])
+
+    def close(self):
+        self.fp.close()
+
+    discard = close
+
+
+class ParquetWriter:
+    """Parquet via pyarrow, flushed as a row group every PARQUET_BATCH rows."""
+
+    def __init__(self, output_path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow)") from None
+        self.pa = pa
+        self.pq = pq
+        self.output_path = output_path
+        self.schema = None
+        self.writer = None
+        self.columns = None
+
+    def write_header(self, headers):
+        pa = self.pa
+        self.schema = pa.schema([
+            (headers[0], pa.string()),
+            (headers[1], pa.string()),
+            (headers[2], pa.string()),
+            (headers[3], pa.list_(pa.string())),
+        ])
+        self.writer = self.pq.ParquetWriter(self.output_path, self.schema)
+        self.columns = [[] for _ in headers]
+
+    def write_row(self, values, story):
+        columns = self.columns
+        columns[0].append(values[0])
+        columns[1].append(values[1])
+        columns[2].append(values[2])
+        columns[3].append(list(story["criteria"]))
+        if len(columns[0]) >= PARQUET_BATCH:
+            self._flush()
+
+    def _flush(self):
+        if self.columns[0]:
+            self.writer.write_table(self.pa.Table.from_arrays(
+                [self.pa.array(column, type=field.type) for column, field in zip(self.columns, self.schema)],
+                schema=self.schema))
+            self.columns = [[] for _ in self.columns]
+
+    def close(self):
+        self._flush()
+        self.writer.close()
+
+    def discard(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def _openpyxl_writer(output_path, autofit=False, table=False, compression=DEFAULT, parallel=False):
+    from .workbook import XlsxWriter
+    return XlsxWriter(output_path, table, compression, parallel)
+
+
+def _raw_writer(output_path, autofit=False, table=False, compression=DEFAULT, parallel=False):
+    from .rawxlsx import RawXlsxWriter
+    return RawXlsxWriter(output_path, compression, autofit, parallel)
+
+
+XLSX_BACKENDS = {
+    "openpyxl": _openpyxl_writer,
+    "raw": _raw_writer,
+}
+
+WRITERS = {
+    ".csv": CsvWriter,
+    ".jsonl": JsonlWriter,
+    ".md": MarkdownWriter,
+    ".parquet": ParquetWriter,
+    ".xlsx": None,  # see XLSX_BACKENDS
+}
+
+
+def check_output(output_path, xlsx_backend="openpyxl", autofit=False, table=False):
+    """Raise ValueError if ``output_path`` cannot be written with these options.
+
+    Opening a writer truncates its file, so ``export`` checks every output
+    with this before it opens the first one.
+    """
+    suffix = Path(output_path).suffix.lower()
+    if suffix not in WRITERS:
+        raise ValueError(f"{output_path}: unsupported output format, "
+                         f"expected one of {', '.join(sorted(WRITERS))}")
+    if suffix == ".parquet" and importlib.util.find_spec("pyarrow") is None:
+        raise ValueError(f"{output_path}: Parquet output needs pyarrow (pip install pyarrow)")
+    if suffix != ".xlsx":
+        return
+    if xlsx_backend not in XLSX_BACKENDS:
+        raise ValueError(f"{output_path}: unknown XLSX backend {xlsx_backend!r}")
+    if autofit and xlsx_backend == "openpyxl":
+        # openpyxl writes <cols> with the first row, before any widths are known
+        raise ValueError(f"{output_path}: autofit needs the raw XLSX backend when streaming")
+    if table and xlsx_backend == "raw":
+        raise ValueError(f"{output_path}: the table layout needs the openpyxl XLSX backend")
+
+
+def writer_for(output_path, xlsx_backend="openpyxl", autofit=False, table=False, compression=DEFAULT,
+               parallel=False):
+    check_output(output_path, xlsx_backend, autofit, table)
+    suffix = Path(output_path).suffix.lower()
+    if WRITERS[suffix] is None:
+        return XLSX_BACKENDS[xlsx_backend](output_path, autofit, table, compression, parallel)
+    return WRITERS[suffix](output_path)
+
+
+def export(stories, output_paths, xlsx_backend="openpyxl", autofit=False, table=False, compression=DEFAULT,
+           parallel=False):
+    """Write ``stories`` to every path in ``output_paths`` in a single pass.
+
+    ``xlsx_backend`` picks the XLSX writer: "openpyxl" (workbook.XlsxWriter)
+    or "raw" (rawxlsx.RawXlsxWriter). ``autofit`` sizes XLSX rows and
+    columns to their content; only the raw backend supports it here.
+    ``table`` gives openpyxl XLSX outputs the Excel Table layout.
+    ``compression`` and ``parallel`` set how XLSX outputs are zipped (see
+    compression.py). Every output is checked before any file is opened, so
+    a ValueError leaves them all untouched. Returns the number of stories
+    written.
+    """
+    for path in output_paths:
+        check_output(path, xlsx_backend, autofit, table)
+    writers = []
+    try:
+        for path in output_paths:
+            writers.append(writer_for(path, xlsx_backend, autofit, table, compression, parallel))
+        for writer in writers:
+            writer.write_header(HEADERS)
+        count = 0
+        with span("rows"):
+            for story in stories:
+                values = story_values(story)
+                for writer in writers:
+                    writer.write_row(values, story)
+                count += 1
+    except BaseException:
+        # writers that stage their output (rawxlsx) drop it, leaving the old file;
+        # the text writers close their files
+        for writer in writers:
+            if hasattr(writer, "discard"):
+                writer.discard()
+        raise
+    with span("save"):
+        for writer in writers:
+            writer.close()
+    return count
@@ -0,0 +1,144 @@
+"""Assemble an XLSX package around ready-made worksheet parts.
+
+Writers that produce ``sheet.xml`` bodies themselves (merged shards, the raw
+SpreadsheetML backend) use this for the fixed package parts: content types,
+relationships, the workbook part and document properties.
+"""
+
+import re
+from datetime import datetime, timezone
+from xml.sax.saxutils import quoteattr
+
+MAX_TITLE = 31
+_BAD_TITLE_CHARS = re.compile(r"[\[\]:*?/\\]")
+
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+SHEET_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+CT_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+
+_SHEET_CT = "application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"
+_WORKBOOK_CT = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"
+_STYLES_CT = "application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"
+_THEME_CT = "application/vnd.openxmlformats-officedocument.theme+xml"
+_SST_CT = "application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"
+_CORE_CT = "application/vnd.openxmlformats-package.core-properties+xml"
+_APP_CT = "application/vnd.openxmlformats-officedocument.extended-properties+xml"
+
+_SHEET_REL = REL_NS + "/worksheet"
+_STYLES_REL = REL_NS + "/styles"
+_THEME_REL = REL_NS + "/theme"
+_SST_REL = REL_NS + "/sharedStrings"
+
+
+def sheet_titles(names):
+    """Valid, unique Excel sheet titles for ``names``, in order."""
+    titles, taken = [], set()
+    for name in names:
+        base = _BAD_TITLE_CHARS.sub(" ", str(name)).strip() or "Sheet"
+        title, n = base[:MAX_TITLE], 1
+        while title.lower() in taken:
+            n += 1
+            suffix = f" ({n})"
+            title = base[:MAX_TITLE - len(suffix)] + suffix
+        taken.add(title.lower())
+        titles.append(title)
+    return titles
+
+
+def sheet_part(index):
+    """Zip member name of the ``index``-th worksheet (1-based)."""
+    return f"xl/worksheets/sheet{index}.xml"
+
+
+def content_types(sheet_count, theme=True, shared_strings=False):
+    parts = [
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>',
+        '<Default Extension="xml" ContentType="application/xml"/>',
+        f'<Override PartName="/xl/workbook.xml" ContentType="{_WORKBOOK_CT}"/>',
+    ]
+    parts += [f'<Override PartName="/{sheet_part(i)}" ContentType="{_SHEET_CT}"/>'
+              for i in range(1, sheet_count + 1)]
+    parts.append(f'<Override PartName="/xl/styles.xml" ContentType="{_STYLES_CT}"/>')
+    if theme:
+        parts.append(f'<Override PartName="/xl/theme/theme1.xml" ContentType="{_THEME_CT}"/>')
+    if shared_strings:
+        parts.append(f'<Override PartName="/xl/sharedStrings.xml" ContentType="{_SST_CT}"/>')
+    parts.append(f'<Override PartName="/docProps/core.xml" ContentType="{_CORE_CT}"/>')
+    parts.append(f'<Override PartName="/docProps/app.xml" ContentType="{_APP_CT}"/>')
+    return f'{XML_DECLARATION}<Types xmlns="{CT_NS}">{"".join(parts)}</Types>'
+
+
+def root_rels():
+    return (
+        f'{XML_DECLARATION}<Relationships xmlns="{PKG_REL_NS}">'
+        f'<Relationship Id="rId1" Type="{REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+        f'<Relationship Id="rId2" Type="{PKG_REL_NS}/metadata/core-properties" Target="docProps/core.xml"/>'
+        f'<Relationship Id="rId3" Type="{REL_NS}/extended-properties" Target="docProps/app.xml"/>'
+        '</Relationships>'
+    )
+
+
+def workbook_xml(titles):
+    sheets = "".join(f'<sheet name={quoteattr(title)} sheetId="{i}" r:id="rId{i}"/>'
+                     for i, title in enumerate(titles, 1))
+    return (
+        f'{XML_DECLARATION}<workbook xmlns="{SHEET_NS}" xmlns:r="{REL_NS}">'
+        '<bookViews><workbookView activeTab="0"/></bookViews>'
+        f'<sheets>{sheets}</sheets></workbook>'
+    )
+
+
+def workbook_rels(sheet_count, theme=True, shared_strings=False):
+    rels = [f'<Relationship Id="rId{i}" Type="{_SHEET_REL}" Target="worksheets/sheet{i}.xml"/>'
+            for i in range(1, sheet_count + 1)]
+    extra = [(_STYLES_REL, "styles.xml")]
+    if theme:
+        extra.append((_THEME_REL, "theme/theme1.xml"))
+    if shared_strings:
+        extra.append((_SST_REL, "sharedStrings.xml"))
+    for n, (rel, target) in enumerate(extra, sheet_count + 1):
+        rels.append(f'<Relationship Id="rId{n}" Type="{rel}" Target="{target}"/>')
+    return f'{XML_DECLARATION}<Relationships xmlns="{PKG_REL_NS}">{"".join(rels)}</Relationships>'
+
+
+def core_xml():
+    now = datetime.now(timezone.utc).replace(microsecond=0).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return (
+        f'{XML_DECLARATION}<cp:coreProperties '
+        'xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+        'xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/" '
+        'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">'
+        '<dc:creator>StockZen</dc:creator>'
+        f'<dcterms:created xsi:type="dcterms:W3CDTF">{now}</dcterms:created>'
+        f'<dcterms:modified xsi:type="dcterms:W3CDTF">{now}</dcterms:modified>'
+        '</cp:coreProperties>'
+    )
+
+
+def app_xml():
+    return (
+        f'{XML_DECLARATION}<Properties '
+        'xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties">'
+        '<Application>Microsoft Excel</Application></Properties>'
+    )
+
+
+def write_package(zf, titles, styles_xml, theme_xml=None, shared_strings=False):
+    """Write every part except the worksheets (and sharedStrings.xml) into ``zf``.
+
+    The caller writes worksheet ``i`` (1-based, in ``titles`` order) to
+    ``sheet_part(i)``.
+    """
+    count = len(titles)
+    theme = theme_xml is not None
+    zf.writestr("[Content_Types].xml", content_types(count, theme, shared_strings))
+    zf.writestr("_rels/.rels", root_rels())
+    zf.writestr("docProps/core.xml", core_xml())
+    zf.writestr("docProps/app.xml", app_xml())
+    zf.writestr("xl/workbook.xml", workbook_xml(titles))
+    zf.writestr("xl/_rels/workbook.xml.rels", workbook_rels(count, theme, shared_strings))
+    zf.writestr("xl/styles.xml", styles_xml)
+    if theme:
+        zf.writestr("xl/theme/theme1.xml", theme_xml)